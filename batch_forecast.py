@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from energy_data import CountryIndex, EnergyFileError, content_digest, read_energy_file
+from forecasting import (
+    DEFAULT_MODEL,
+    FORECASTERS,
+    MAX_HORIZON,
+    TASK_TIMEOUT,
+    build_forecast_table,
+    table_path,
+    write_forecast_table,
+)
+
+# 사용법: python batch_forecast.py energy.csv [--model arima] [--out 경로] [--workers N]
+# 결과 테이블은 기본적으로 forecast_tables/<CSV 해시>-<모델>.parquet 에 저장되고,
+# 같은 CSV를 업로드한 에너지 페이지는 모델 적합 없이 이 테이블을 사용합니다.
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="모든 국가의 전력 소비 예측 테이블을 미리 계산합니다.")
+    parser.add_argument("csv", help="country, year, electricity_demand, ... 컬럼을 가진 CSV/Parquet/Feather/Arrow 파일")
+    parser.add_argument("--model", choices=list(FORECASTERS), default=DEFAULT_MODEL, help="예측 모델")
+    parser.add_argument("--out", help="결과 파일 경로 (.parquet 또는 .feather)")
+    parser.add_argument("--workers", type=int, default=None, help="병렬 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument("--steps", type=int, default=MAX_HORIZON,
+                        help="예측할 연도 수 (페이지는 이보다 짧은 기간을 앞부분만 잘라 씀)")
+    parser.add_argument("--timeout", type=float, default=TASK_TIMEOUT, help="작업 시간 초과(초)")
+    args = parser.parse_args(argv)
+
+    with open(args.csv, "rb") as f:
+        raw = f.read()
+
+    try:
+        df = read_energy_file(raw, args.csv)
+    except EnergyFileError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    table, errors = build_forecast_table(CountryIndex(df), args.model, args.steps, args.workers, args.timeout)
+    out = args.out or table_path(content_digest(raw), args.model)
+    write_forecast_table(table, out)
+
+    for country, error in errors.items():
+        print(f"{country} 모델 훈련 오류: {error}", file=sys.stderr)
+    print(f"{table['country'].nunique()}개 국가 예측 완료 -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
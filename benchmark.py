@@ -0,0 +1,304 @@
+import argparse
+import gc
+import glob
+import hashlib
+import json
+import logging
+import os
+import platform
+import resource
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# 사용법: python benchmark.py [--countries N] [--years M] [--tickers T] [--days D] [--out 경로] [--compare 기준.json]
+# 브라우저 없이 합성 데이터로 데이터 읽기, 국가별 조회, 예측, 차트, 지도, 주가 처리와
+# 페이지 02, 04~07 전체 실행 시간을 단계별로 재고, 결과를 JSON 기준 파일로 저장합니다.
+# --compare로 이전 기준 파일을 주면 --tolerance 이상 느려진 단계가 있을 때 종료 코드 1을 반환합니다.
+
+DEFAULT_OUT = "benchmark_baseline.json"
+PAGES = ["pages/02_*.py", "pages/04_*.py", "pages/05_*.py", "pages/06_*.py", "pages/07_*.py"]
+
+
+def synthetic_energy_csv(countries, years, seed=0):
+    # 국가 수 x 연도 수 행을 가진 에너지 CSV 바이트 (국가별로 성장률이 다른 지수 증가 + 잡음)
+    rng = np.random.default_rng(seed)
+    names = np.repeat([f"Country {i:04d}" for i in range(countries)], years)
+    year = np.tile(np.arange(2023 - years, 2023), countries)
+    growth = np.repeat(rng.normal(0.02, 0.01, countries), years)
+    base = np.repeat(rng.uniform(1, 500, countries), years)
+    step = np.tile(np.arange(years), countries)
+    demand = base * np.exp(growth * step) * rng.normal(1, 0.02, len(step))
+    population = np.repeat(rng.uniform(1e6, 1e8, countries), years) * (1.01 ** step)
+    gdp = population * np.repeat(rng.uniform(1e3, 5e4, countries), years) * (1.02 ** step)
+    df = pd.DataFrame({
+        "country": names,
+        "year": year,
+        "electricity_demand": demand,
+        "population": population,
+        "gdp": gdp,
+        "energy_per_capita": demand * 1e9 / population,
+        "energy_per_gdp": demand * 1e9 / gdp,
+    })
+    return df.to_csv(index=False).encode()
+
+
+def _ticker_prices(ticker, days):
+    seed = int(hashlib.sha256(ticker.encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed)
+    return 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(days))))
+
+
+def stub_yfinance():
+    # 네트워크 없이 yf.download / yf.Ticker(...).info 형식을 흉내 내는 가짜 yfinance 모듈
+    module = types.ModuleType("yfinance")
+
+    def download(tickers, start, end, **kwargs):
+        days = pd.bdate_range(start, pd.Timestamp(end) - timedelta(days=1))
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        columns = {}
+        for ticker in tickers:
+            close = _ticker_prices(ticker, days)
+            columns[("Close", ticker)] = close
+            columns[("Adj Close", ticker)] = close * 0.98
+        return pd.DataFrame(columns, index=days)
+
+    class Ticker:
+        def __init__(self, ticker):
+            self.info = {"marketCap": 10 ** 13, "trailingPE": 12.3, "priceToBook": 1.1, "dividendYield": 2.0}
+
+    module.download = download
+    module.Ticker = Ticker
+    return module
+
+
+class _Upload:
+    # st.file_uploader가 돌려주는 UploadedFile 대용
+    def __init__(self, raw, name):
+        self._raw = raw
+        self.name = name
+        self.file_id = hashlib.sha256(raw).hexdigest()
+
+    def getvalue(self):
+        return self._raw
+
+    def read(self):
+        return self._raw
+
+
+def measure(func, repeat=1):
+    """func를 repeat번 실행한 가장 빠른 시간(초)과, 한 번 더 실행해 잰 최대 메모리 사용량(MB)을 반환.
+
+    tracemalloc은 실행을 느리게 하므로 시간과 메모리는 따로 잼.
+    메모리는 이 프로세스의 파이썬 할당만 측정함 (ARIMA 프로세스 풀의 작업자는 제외).
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(min(times), 4), "peak_mb": round(peak / 2 ** 20, 2)}, result
+
+
+def run_energy(args, results):
+    from charts import METRICS, build_animated_choropleth, build_choropleth, build_metric_figure, year_matrix
+    from energy_data import CountryIndex, read_energy_file, to_parquet_bytes
+    from forecasting import FORECASTERS, forecast_cache, order_cache, params_cache
+
+    csv = synthetic_energy_csv(args.countries, args.years)
+    results["ingest_csv"], df = measure(lambda: read_energy_file(csv, "energy.csv"), args.repeat)
+    parquet = to_parquet_bytes(df)
+    results["ingest_parquet"], _ = measure(lambda: read_energy_file(parquet, "energy.parquet"), args.repeat)
+    results["country_index"], index = measure(lambda: CountryIndex(df), args.repeat)
+
+    def slice_all():
+        return [index.get(country)["electricity_demand"] for country in index.countries]
+
+    results["slice_all_countries"], series = measure(slice_all, args.repeat)
+    series = dict(zip(index.countries, series))
+
+    for key in ("holt", "trend", "drift"):
+        results[f"forecast_{key}"], _ = measure(lambda: list(FORECASTERS[key].forecast_many(series)), args.repeat)
+
+    # ARIMA는 캐시를 비운 상태에서 적합 시간을 잼 (느리므로 일부 국가만)
+    subset = dict(list(series.items())[:args.arima_countries])
+
+    def fit_arima():
+        for cache in (forecast_cache, order_cache, params_cache):
+            cache.clear()
+        return list(FORECASTERS["arima"].forecast_many(subset, max_workers=args.workers))
+
+    results["forecast_arima"], _ = measure(fit_arima)
+    results["forecast_arima"]["countries"] = len(subset)
+
+    countries = index.countries[:args.chart_countries]
+
+    def figures():
+        return [
+            build_metric_figure(index, countries, metric, metric, metric).to_json()
+            for metric in METRICS
+        ]
+
+    results["metric_figures"], _ = measure(figures, args.repeat)
+    results["year_matrix"], matrix = measure(lambda: year_matrix(index), args.repeat)
+    last_year = int(matrix.columns.max())
+    results["choropleth"], _ = measure(lambda: build_choropleth(matrix, last_year).to_json(), args.repeat)
+    results["choropleth_animated"], _ = measure(lambda: build_animated_choropleth(matrix).to_json())
+    return csv
+
+
+def run_stocks(args, results, store_path):
+    from charts import wide_line_figure
+    from stock_analytics import correlation_matrix, drawdown, normalized_returns, rolling_volatility, summary
+    from stock_data import PriceStore, YahooSource
+
+    tickers = [f"{i:06d}.KS" for i in range(args.tickers)]
+    end = date.today()
+    start = end - timedelta(days=int(args.days * 7 / 5))
+    stores = []
+
+    def download():
+        # 매번 빈 저장소에서 시작해 전 구간을 받음
+        if os.path.exists(store_path):
+            os.remove(store_path)
+        stores.append(PriceStore(store_path, YahooSource()))
+        return reread()
+
+    def reread():
+        stores[-1].fetch(tickers, start, end)
+        return stores[-1].read(tickers, start, end)
+
+    results["prices_download"], (prices, _) = measure(download)
+    results["prices_reread"], _ = measure(reread, args.repeat)
+    benchmark = prices.iloc[:, 0]
+
+    def analytics():
+        return (
+            summary(prices, benchmark),
+            rolling_volatility(prices),
+            drawdown(prices),
+            correlation_matrix(prices),
+        )
+
+    results["stock_analytics"], _ = measure(analytics, args.repeat)
+    results["stock_figure"], _ = measure(
+        lambda: wide_line_figure(normalized_returns(prices), "수익률", "%").to_json(), args.repeat
+    )
+
+
+def run_pages(args, results, csv):
+    # 스트림릿 런타임 없이 페이지 스크립트를 실행. 매번 캐시를 비워 첫 방문(콜드) 시간을 잼
+    import streamlit as st
+
+    from forecasting import forecast_cache, order_cache, params_cache
+
+    upload = _Upload(csv, "energy.csv")
+    errors = []
+    st.file_uploader = lambda *a, **k: upload
+    st.error = lambda *a, **k: errors.append(a)
+
+    for pattern in PAGES:
+        for page in sorted(glob.glob(pattern)):
+            def run():
+                st.cache_data.clear()
+                st.cache_resource.clear()
+                for cache in (forecast_cache, order_cache, params_cache):
+                    cache.clear()
+                runpy.run_path(page, run_name="__main__")
+
+            errors.clear()
+            results[f"page:{os.path.basename(page)}"], _ = measure(run)
+            if errors:
+                results[f"page:{os.path.basename(page)}"]["errors"] = [str(e[0]) for e in errors]
+
+
+def compare(results, baseline, tolerance):
+    # 기준보다 (1 + tolerance)배 넘게 느려진 단계 목록
+    regressions = []
+    for stage, result in results.items():
+        before = baseline.get(stage)
+        if before and before["seconds"] > 0 and result["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append((stage, before["seconds"], result["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="데이터, 예측, 차트 처리 시간을 합성 데이터로 측정합니다.")
+    parser.add_argument("--countries", type=int, default=200, help="합성 국가 수")
+    parser.add_argument("--years", type=int, default=60, help="국가별 연도 수")
+    parser.add_argument("--tickers", type=int, default=50, help="합성 종목 수")
+    parser.add_argument("--days", type=int, default=1250, help="종목별 거래일 수")
+    parser.add_argument("--arima-countries", type=int, default=20, help="ARIMA를 적합할 국가 수")
+    parser.add_argument("--chart-countries", type=int, default=10, help="차트에 그릴 국가 수")
+    parser.add_argument("--workers", type=int, default=None, help="ARIMA 병렬 프로세스 수")
+    parser.add_argument("--repeat", type=int, default=3, help="빠른 단계의 반복 횟수 (가장 빠른 값을 사용)")
+    parser.add_argument("--skip-pages", action="store_true", help="페이지 전체 실행은 건너뜀")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 기준 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용하는 느려짐 비율")
+    args = parser.parse_args(argv)
+
+    # statsmodels는 불러올 때 자체 경고 필터를 추가하므로 먼저 불러온 뒤 경고를 끔.
+    # 런타임 없이 실행할 때 나오는 스트림릿 경고도 숨김
+    import statsmodels.tsa.arima.model  # noqa: F401
+
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)
+    sys.modules["yfinance"] = stub_yfinance()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.pop("STOCK_PRICE_SOURCE", None)
+        os.environ["STOCK_STORE_PATH"] = os.path.join(tmp, "pages.sqlite3")
+        os.environ["FORECAST_TABLE_DIR"] = os.path.join(tmp, "tables")
+        os.environ.pop("FORECAST_CACHE_DIR", None)
+
+        csv = run_energy(args, results)
+        run_stocks(args, results, os.path.join(tmp, "bench.sqlite3"))
+        if not args.skip_pages:
+            run_pages(args, results, csv)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("out", "compare", "tolerance")},
+        # 리눅스에서는 KB 단위
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for stage, result in results.items():
+        print(f"{result['seconds']:9.4f}s {result['peak_mb']:9.2f} MB  {stage}")
+    print(f"최대 RSS {report['max_rss_mb']} MB -> {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+        regressions = compare(results, baseline, args.tolerance)
+        for stage, before, after in regressions:
+            print(f"느려짐: {stage} {before:.4f}s -> {after:.4f}s", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
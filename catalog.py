@@ -0,0 +1,123 @@
+import itertools
+import json
+import os
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+import streamlit as st
+
+# 추천 카탈로그(JSON) 경로. 지정하지 않으면 저장소의 data/recommendations.json 사용
+CATALOG_PATH_ENV = "RECOMMENDATION_CATALOG"
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recommendations.json")
+# 정확히 맞는 항목이 없을 때, 가장 비슷한 항목 몇 개의 추천을 이어 붙일지
+FALLBACK_ENTRIES = 3
+
+# items: 추천 목록 (읽기 전용), keys: 실제로 찾은 항목의 키, exact: 요청한 키와 정확히 일치했는지
+Match = namedtuple("Match", ["items", "keys", "exact"])
+
+
+def _letters(a, b):
+    # MBTI처럼 자리마다 의미가 있는 코드: 같은 자리의 글자가 일치하는 비율
+    return sum(x == y for x, y in zip(a, b)) / max(len(a), len(b), 1)
+
+
+SIMILARITIES = {
+    "exact": lambda a, b: float(a == b),
+    "letters": _letters,
+}
+
+
+class Collection:
+    """키 차원(예: 장르, MBTI)별 추천 항목 모음.
+
+    불러올 때 차원의 모든 부분집합에 대해 (값...) -> 추천 목록 색인을 만들어 두므로
+    어떤 키 조합이든 딕셔너리 조회 한 번으로 찾음. 없는 조합은 비슷한 순으로 대신 추천.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        dimensions = spec["dimensions"]
+        self.dimensions = tuple(dimensions)
+        self.values = MappingProxyType({dim: tuple(dimensions[dim]["values"]) for dim in self.dimensions})
+        self._weights = [dimensions[dim].get("weight", 1) for dim in self.dimensions]
+        self._similarity = [SIMILARITIES[dimensions[dim].get("similarity", "exact")] for dim in self.dimensions]
+
+        entries = []
+        for entry in spec["entries"]:
+            keys = tuple(entry["keys"][dim] for dim in self.dimensions)
+            items = tuple(MappingProxyType(dict(item)) for item in entry["items"])
+            entries.append((keys, items))
+        self._entries = tuple(entries)
+
+        self._index = {}
+        for size in range(len(self.dimensions) + 1):
+            for positions in itertools.combinations(range(len(self.dimensions)), size):
+                index = {}
+                for keys, items in entries:
+                    index.setdefault(tuple(keys[i] for i in positions), []).extend(items)
+                self._index[positions] = {values: tuple(items) for values, items in index.items()}
+
+        # 없는 조합의 대체 추천은 처음 요청될 때 한 번만 계산
+        self._fallback = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, **keys):
+        unknown = set(keys) - set(self.dimensions)
+        if unknown:
+            raise KeyError(f"{self.name}: 알 수 없는 키 {sorted(unknown)}")
+
+        positions = tuple(i for i, dim in enumerate(self.dimensions) if dim in keys)
+        values = tuple(keys[self.dimensions[i]] for i in positions)
+        items = self._index[positions].get(values)
+        if items:
+            return Match(items, dict(keys), True)
+
+        with self._lock:
+            match = self._fallback.get((positions, values))
+        if match is None:
+            match = self._rank(positions, values)
+            with self._lock:
+                self._fallback[(positions, values)] = match
+        return match
+
+    def _rank(self, positions, values):
+        # 차원별 유사도 x 가중치의 합이 큰 순서 (같으면 카탈로그 순서)
+        def score(entry):
+            keys = entry[0]
+            return sum(self._weights[i] * self._similarity[i](value, keys[i]) for i, value in zip(positions, values))
+
+        ranked = sorted(self._entries, key=score, reverse=True)[:FALLBACK_ENTRIES]
+        if not ranked:
+            return Match((), {}, False)
+        items = tuple(item for _, entry_items in ranked for item in entry_items)
+        return Match(items, dict(zip(self.dimensions, ranked[0][0])), False)
+
+
+class Catalog:
+    def __init__(self, spec):
+        self._collections = MappingProxyType({name: Collection(name, value) for name, value in spec.items()})
+
+    def __getitem__(self, name):
+        return self._collections[name]
+
+    def __contains__(self, name):
+        return name in self._collections
+
+    def lookup(self, name, **keys):
+        return self._collections[name].lookup(**keys)
+
+
+def load_catalog(path=None):
+    path = path or os.environ.get(CATALOG_PATH_ENV, DEFAULT_CATALOG_PATH)
+    with open(path, encoding="utf-8") as f:
+        return Catalog(json.load(f))
+
+
+@st.cache_resource
+def get_catalog():
+    # 프로세스마다 한 번만 읽어 모든 세션이 공유
+    return load_catalog()
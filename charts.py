@@ -0,0 +1,236 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from plotly.colors import qualitative
+
+from instrumentation import miss, stage
+
+# 여러 국가를 겹쳐 그릴 때 국가별 색상
+COLORS = qualitative.D3
+# 캐시에 보관할 차트 수 (국가 조합 x 지표)
+MAX_CACHED_FIGURES = 256
+# 차트 가로 픽셀 수. 픽셀 구간마다 최솟값/최댓값 두 점만 남겨도 선 모양은 그대로 보임
+CHART_WIDTH = 1200
+
+# 지표별 선 구성: (컬럼, 이름, 나눌 단위, 선 모양, 단일 국가일 때 색상)
+METRICS = {
+    "demand": [
+        ("electricity_demand", "실제 전력 소비", 1, "solid", "blue"),
+    ],
+    "economy": [
+        ("electricity_demand", "전력 소비 (TWh)", 1, "solid", "blue"),
+        ("population", "인구 (백만명)", 1e6, "dash", "green"),
+        ("gdp", "GDP (천억)", 1e3, "dashdot", "orange"),
+    ],
+    "efficiency": [
+        ("energy_per_capita", "1인당 에너지 소비", 1, "solid", "purple"),
+        ("energy_per_gdp", "GDP당 에너지 소비", 1, "dash", "red"),
+    ],
+}
+
+
+def minmax_indices(y, n_out):
+    # 구간별 최솟값/최댓값 위치 (+ 처음/끝 점)를 벡터 연산으로 구함
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    order = np.lexsort((y, bucket_of))
+    starts = edges[:-1][np.diff(edges) > 0]
+    ends = edges[1:][np.diff(edges) > 0] - 1
+    return np.unique(np.concatenate(([0, n - 1], order[starts], order[ends])))
+
+
+def downsample(x, y, width=CHART_WIDTH):
+    """선 그래프에 보낼 점을 화면 픽셀 수에 맞게 줄임. 점이 적으면 그대로 반환."""
+    y = np.asarray(y, dtype="float64")
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = np.asarray(x)[valid], y[valid]
+    if len(y) <= 2 * width:
+        return x, y
+    keep = minmax_indices(y, 2 * width)
+    return np.asarray(x)[keep], y[keep]
+
+
+def country_colors(countries):
+    return {country: COLORS[i % len(COLORS)] for i, country in enumerate(countries)}
+
+
+def _layout(fig, title, ylabel):
+    fig.update_layout(
+        title=title,
+        yaxis_title=ylabel,
+        template="plotly_white",
+        hovermode="x unified",
+    )
+    return fig
+
+
+def build_metric_figure(index, countries, metric, title, ylabel):
+    fig = go.Figure()
+    colors = country_colors(countries)
+    single = len(countries) == 1
+    for country in countries:
+        country_df = index.get(country)
+        for column, label, scale, dash, single_color in METRICS[metric]:
+            x, y = downsample(country_df.index, country_df[column].to_numpy() / scale)
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode="lines",
+                name=label if single else f"{country} {label}",
+                line=dict(color=single_color if single else colors[country], dash=dash,
+                          width=2 if column == "electricity_demand" else 1.5),
+            ))
+    return _layout(fig, title, ylabel)
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def _metric_figure_json(digest, countries, metric, title, ylabel, _index):
+    # 데이터 해시 + 국가 조합 + 지표로 캐시하고, 그림은 JSON 문자열로 보관
+    miss()
+    return build_metric_figure(_index, list(countries), metric, title, ylabel).to_json()
+
+
+def metric_figure(index, countries, metric, title, ylabel):
+    with stage("metric_figure", cached=index.digest is not None):
+        if index.digest is None:
+            return build_metric_figure(index, list(countries), metric, title, ylabel)
+        return pio.from_json(_metric_figure_json(index.digest, tuple(countries), metric, title, ylabel, index))
+
+
+def wide_line_figure(frame, title, yaxis_title, names=None):
+    # (날짜 x 종목) 넓은 표의 각 열을 선 하나로 그림
+    names = names or {}
+    with stage("wide_line_figure"):
+        fig = go.Figure()
+        for i, column in enumerate(frame.columns):
+            x, y = downsample(frame.index, frame[column].to_numpy())
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode="lines",
+                name=names.get(column, column),
+                line=dict(color=COLORS[i % len(COLORS)]),
+            ))
+        fig.update_layout(xaxis_title="날짜")
+        return _layout(fig, title, yaxis_title)
+
+
+def add_forecast_trace(fig, name, forecast, color):
+    # 예측 구간(95%, 80%)을 옅은 띠로 먼저 그리고 그 위에 점선 예측을 그림. 띠는 범례 항목 하나로 함께 켜고 끔
+    x = np.concatenate([forecast.index, forecast.index[::-1]])
+    for level, opacity in ((95, 0.12), (80, 0.22)):
+        lower, upper = forecast[f"lower_{level}"].to_numpy(), forecast[f"upper_{level}"].to_numpy()
+        if not np.isfinite(lower).all() or not np.isfinite(upper).all():
+            continue
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=np.concatenate([upper, lower[::-1]]),
+            fill="toself",
+            mode="lines",
+            line=dict(width=0, color=color),
+            opacity=opacity,
+            name=f"{name} {level}% 구간",
+            legendgroup=name,
+            showlegend=False,
+            hoverinfo="skip",
+        ))
+    fig.add_trace(go.Scatter(
+        x=forecast.index,
+        y=forecast["forecast"].to_numpy(),
+        mode="lines",
+        name=name,
+        legendgroup=name,
+        line=dict(color=color, dash="dash"),
+    ))
+    return fig
+
+
+@st.cache_resource(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def _year_matrix(digest, _index):
+    frame = _index.frame
+    return frame.pivot_table(
+        index="country", columns=frame.index.year, values="electricity_demand", observed=True, sort=True,
+    )
+
+
+def year_matrix(index):
+    # 국가 x 연도 전력 소비 행렬. 데이터마다 한 번만 만들고 지도는 열 하나만 꺼내서 그림
+    if index.digest is None:
+        return _year_matrix.__wrapped__(None, index)
+    return _year_matrix(index.digest, index)
+
+
+def _map_labels():
+    return {"electricity_demand": "전력 소비량", "year": "연도"}
+
+
+def build_choropleth(matrix, year):
+    column = matrix[year].dropna()
+    # plotly.express는 불러오는 데 시간이 걸리므로 지도를 처음 그릴 때 가져옴
+    import plotly.express as px
+
+    map_df = column.rename("electricity_demand").rename_axis("country").reset_index()
+    return px.choropleth(
+        map_df,
+        locations="country",
+        locationmode="country names",
+        color="electricity_demand",
+        color_continuous_scale="Blues",
+        range_color=(float(matrix.min().min()), float(matrix.max().max())),
+        title=f"{year}년 국가별 전력 소비량 (TWh)",
+        labels=_map_labels(),
+    )
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner=False)
+def _choropleth_json(digest, year, _index):
+    miss()
+    return build_choropleth(year_matrix(_index), year).to_json()
+
+
+def choropleth_figure(index, year):
+    with stage("choropleth_figure", cached=index.digest is not None):
+        if index.digest is None:
+            return build_choropleth(year_matrix(index), year)
+        return pio.from_json(_choropleth_json(index.digest, year, index))
+
+
+def build_animated_choropleth(matrix):
+    # 모든 연도를 프레임으로 담아, 연도 이동은 브라우저에서만 처리 (서버 재실행 없음)
+    import plotly.express as px
+
+    map_df = matrix.stack().rename("electricity_demand").rename_axis(["country", "year"]).reset_index()
+    return px.choropleth(
+        map_df,
+        locations="country",
+        locationmode="country names",
+        color="electricity_demand",
+        animation_frame="year",
+        color_continuous_scale="Blues",
+        range_color=(float(matrix.min().min()), float(matrix.max().max())),
+        title="연도별 국가별 전력 소비량 (TWh)",
+        labels=_map_labels(),
+    )
+
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES, show_spinner="지도를 만드는 중...")
+def _animated_choropleth_json(digest, _index):
+    miss()
+    return build_animated_choropleth(year_matrix(_index)).to_json()
+
+
+def animated_choropleth_figure(index):
+    with stage("animated_choropleth_figure", cached=index.digest is not None):
+        if index.digest is None:
+            return build_animated_choropleth(year_matrix(index))
+        return pio.from_json(_animated_choropleth_json(index.digest, index))
+
+
+def plotly_chart(fig, target=None, **kwargs):
+    # st.plotly_chart와 같고, 그림을 JSON으로 직렬화해 보내는 시간을 계측. target: st.empty() 등 그릴 자리
+    with stage("plotly_chart"):
+        return (st if target is None else target).plotly_chart(fig, use_container_width=True, **kwargs)
@@ -0,0 +1,384 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from instrumentation import miss, stage
+
+# 필요한 기본 컬럼
+BASE_COLS = ["country", "year", "electricity_demand"]
+ADDITIONAL_COLS = ["population", "gdp", "energy_per_capita", "energy_per_gdp"]
+ALL_REQUIRED = BASE_COLS + ADDITIONAL_COLS
+NUMERIC_COLS = ["electricity_demand"] + ADDITIONAL_COLS
+
+# 캐시에 보관할 업로드 파일 수 (초과하면 가장 오래 안 쓴 것부터 제거)
+MAX_CACHED_FILES = 4
+# 어떤 세션도 쓰지 않는 데이터셋을 이 개수까지만 남겨 둠 (사용 중인 데이터셋은 제거하지 않음)
+MAX_IDLE_DATASETS = MAX_CACHED_FILES
+# CSV는 이 행 수만큼씩 나눠 읽고, 필요한 컬럼만 남긴 뒤 정리 (최대 메모리를 필요한 컬럼 크기로 제한)
+CHUNK_ROWS = 200_000
+# "pyarrow"로 지정하면 pyarrow 엔진으로 한 번에 읽음 (설치되어 있지 않으면 분할 읽기 사용)
+CSV_ENGINE_ENV = "ENERGY_CSV_ENGINE"
+# 업로드할 수 있는 파일 형식 (확장자 -> 읽는 방식)
+UPLOAD_TYPES = ["csv", "parquet", "feather", "arrow"]
+# 세션별 DatasetLease를 두는 session_state 키
+LEASE_KEY = "_energy_dataset_lease"
+
+
+class EnergyFileError(ValueError):
+    # 업로드한 파일 자체의 문제. 페이지는 이 오류를 잡아 메시지만 보여 줌
+    pass
+
+
+class MissingColumnsError(EnergyFileError):
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"필요한 컬럼이 누락되었습니다. 다음 컬럼이 모두 있어야 합니다:\n{ALL_REQUIRED}")
+
+
+class UnreadableFileError(EnergyFileError):
+    def __init__(self, name, reason):
+        self.reason = reason
+        super().__init__(f"파일을 읽을 수 없습니다: {name or '업로드 파일'}\n"
+                         f"CSV, Parquet, Feather, Arrow 형식이 맞는지 확인하세요. ({reason})")
+
+
+def content_digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def file_digest(uploaded_file):
+    # 같은 업로드 파일은 세션마다 한 번만 해싱
+    digests = st.session_state.setdefault("_energy_file_digests", {})
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is not None and file_id in digests:
+        return digests[file_id]
+
+    digest = content_digest(uploaded_file.getvalue())
+    if file_id is not None:
+        digests[file_id] = digest
+    return digest
+
+
+def check_columns(columns):
+    missing = [col for col in ALL_REQUIRED if col not in columns]
+    if missing:
+        raise MissingColumnsError(missing)
+
+
+def _clean_rows(df):
+    df = df[ALL_REQUIRED].dropna()
+
+    # 연도: 행 단위 apply 대신 벡터 연산으로 정수 연도만 남김
+    years = pd.to_numeric(df["year"], errors="coerce")
+    valid = years.notna() & (years % 1 == 0) & (years > 0)
+    df = df[valid.to_numpy()]
+    years = years[valid].astype("int64")
+
+    cleaned = pd.DataFrame({
+        "country": df["country"].astype(str),
+        "year": pd.to_datetime(pd.DataFrame({"year": years, "month": 1, "day": 1})),
+    })
+    for col in NUMERIC_COLS:
+        cleaned[col] = pd.to_numeric(df[col], errors="coerce")
+    return cleaned.dropna()
+
+
+def _finalize(cleaned):
+    cleaned["country"] = cleaned["country"].astype("category")
+    # 숫자 컬럼은 float32로 바꿔도 모든 값이 정확히 같을 때만 줄임 (1.1처럼 float32로 표현되지 않는 값이
+    # 하나라도 있으면 float64 유지). 나눠 읽은 조각을 모두 합친 뒤 한 번에 해야 조각 크기와 관계없이 같은 결과가 나옴
+    for col in NUMERIC_COLS:
+        values = cleaned[col].to_numpy(dtype="float64")
+        narrow = values.astype("float32")
+        cleaned[col] = narrow if np.array_equal(narrow, values, equal_nan=True) else values
+
+    # 국가별 행이 연속되도록 국가, 연도 순으로 정렬
+    return cleaned.sort_values(["country", "year"], kind="stable").reset_index(drop=True)
+
+
+def read_energy_csv(raw, engine=None, progress=None):
+    """CSV 바이트에서 필요한 컬럼만 읽어 정리된 데이터프레임을 반환.
+
+    컬럼 확인은 헤더만 읽어서 하고, 본문은 CHUNK_ROWS 행씩 나눠 읽으면서 바로 정리함.
+    progress가 주어지면 읽은 비율(0~1)로 호출.
+    """
+    buffer = io.BytesIO(raw)
+    check_columns(pd.read_csv(buffer, nrows=0).columns)
+    buffer.seek(0)
+
+    engine = engine or os.environ.get(CSV_ENGINE_ENV)
+    if engine == "pyarrow":
+        try:
+            df = pd.read_csv(buffer, usecols=ALL_REQUIRED, engine="pyarrow")
+        except ImportError:
+            buffer.seek(0)
+        else:
+            if progress:
+                progress(1.0)
+            return _finalize(_clean_rows(df))
+
+    # round_trip: 기본 변환기는 마지막 자리가 어긋날 수 있어, pyarrow 엔진/Parquet와 같은 값이 나오도록 정확히 변환
+    chunks = []
+    for chunk in pd.read_csv(buffer, usecols=ALL_REQUIRED, chunksize=CHUNK_ROWS, float_precision="round_trip"):
+        chunks.append(_clean_rows(chunk))
+        if progress:
+            progress(min(buffer.tell() / max(len(raw), 1), 1.0))
+
+    if not chunks:
+        return _finalize(_clean_rows(pd.DataFrame(columns=ALL_REQUIRED)))
+    return _finalize(pd.concat(chunks, ignore_index=True))
+
+
+def file_format(name):
+    ext = os.path.splitext(name or "")[1].lower().lstrip(".")
+    return ext if ext in UPLOAD_TYPES else "csv"
+
+
+def read_energy_columnar(raw, fmt):
+    """Parquet/Feather/Arrow IPC 바이트를 복사 없이 Arrow 버퍼로 감싸 필요한 컬럼만 읽음."""
+    import pyarrow as pa
+
+    buffer = pa.py_buffer(raw)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        check_columns(pq.read_schema(pa.BufferReader(buffer)).names)
+        table = pq.read_table(pa.BufferReader(buffer), columns=ALL_REQUIRED)
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+
+        try:
+            # Feather v2는 Arrow IPC 파일이라 스키마만 먼저 확인하고 필요한 컬럼만 읽음
+            check_columns(pa.ipc.open_file(buffer).schema.names)
+        except pa.ArrowInvalid:
+            # Feather v1(구버전 pandas/R에서 저장한 파일)은 스키마만 읽을 수 없어 전체를 읽은 뒤 고름
+            table = feather.read_table(pa.BufferReader(buffer))
+            check_columns(table.column_names)
+            table = table.select(ALL_REQUIRED)
+        else:
+            table = feather.read_table(pa.BufferReader(buffer), columns=ALL_REQUIRED)
+    else:
+        # 스트림 형식으로 저장된 .arrow도 허용
+        try:
+            reader = pa.ipc.open_file(buffer)
+        except pa.ArrowInvalid:
+            reader = pa.ipc.open_stream(buffer)
+        check_columns(reader.schema.names)
+        table = reader.read_all().select(ALL_REQUIRED)
+
+    return _finalize(_clean_rows(table.to_pandas()))
+
+
+def read_energy_file(raw, name=None, progress=None):
+    # 형식이 깨진 파일의 파서 오류(ArrowInvalid, ParserError, UnicodeDecodeError 등)는 UnreadableFileError로 바꿈
+    fmt = file_format(name)
+    try:
+        if fmt == "csv":
+            return read_energy_csv(raw, progress=progress)
+        df = read_energy_columnar(raw, fmt)
+    except EnergyFileError:
+        raise
+    except (ValueError, OSError, NotImplementedError) as e:
+        raise UnreadableFileError(name, e) from e
+    if progress:
+        progress(1.0)
+    return df
+
+
+def to_parquet_bytes(df):
+    # 정리된 데이터를 Parquet로 변환 (연도는 정수로 저장해 다시 업로드해도 같은 결과)
+    export = df.assign(year=df["year"].dt.year)[ALL_REQUIRED]
+    buffer = io.BytesIO()
+    export.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def freeze_frame(df):
+    # 숫자 컬럼을 쓰기 금지된 배열로 바꾼 프레임 (공유 데이터가 실수로 수정되면 바로 오류가 나도록)
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, np.dtype):
+            values = df[col].to_numpy().view()
+            values.flags.writeable = False
+            columns[col] = values
+        else:
+            columns[col] = df[col].array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+class CountryIndex:
+    # 국가 -> 연속 구간(start, stop) 색인. 국가별 조회는 전체 스캔 없이 슬라이스로 처리
+    def __init__(self, df, digest=None):
+        # digest: 원본 파일 해시 (차트 등 파생 결과의 캐시 키로 사용)
+        self.digest = digest
+        # 여러 세션이 같은 객체를 공유하므로 숫자 컬럼은 읽기 전용 배열로 보관
+        self.frame = freeze_frame(df.set_index("year"))
+        codes = df["country"].cat.codes.to_numpy()
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.r_[0, boundaries]
+        stops = np.r_[boundaries, len(df)]
+        names = df["country"].to_numpy()
+        self.slices = {
+            str(names[start]): (int(start), int(stop))
+            for start, stop in zip(starts, stops)
+            if stop > start
+        }
+        self.countries = list(self.slices)
+
+    def __contains__(self, country):
+        return country in self.slices
+
+    def get(self, country):
+        # 연도를 인덱스로 하는 국가별 시계열 (복사 없이 슬라이스)
+        with stage("country_slice", memory=False):
+            start, stop = self.slices[country]
+            return self.frame.iloc[start:stop]
+
+    def memory_usage(self):
+        return int(self.frame.memory_usage(deep=True).sum())
+
+
+class DatasetLease:
+    # 세션마다 하나씩 session_state에 두는 참조. 세션이 끝나 사라지면 참조 수도 자동으로 줄어듦
+    def __init__(self):
+        self.digest = None
+
+
+class DatasetRegistry:
+    """내용 해시 -> 정리된 데이터셋(CountryIndex)을 프로세스 전체에서 한 벌만 보관하는 저장소.
+
+    세션은 DatasetLease로 데이터셋을 참조하고, 참조하는 세션이 없는 데이터셋은
+    MAX_IDLE_DATASETS개를 넘으면 가장 오래 안 쓴 것부터 제거함.
+    """
+
+    def __init__(self, max_idle=MAX_IDLE_DATASETS):
+        self.max_idle = max_idle
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, digest, lease, loader):
+        with self._lock:
+            entry = self._entries.get(digest)
+            build_lock = None if entry else self._building.setdefault(digest, threading.Lock())
+
+        if entry is None:
+            # 같은 파일을 여러 세션이 동시에 올려도 한 번만 읽음
+            with build_lock:
+                with self._lock:
+                    entry = self._entries.get(digest)
+                if entry is None:
+                    entry = {"index": loader(), "leases": weakref.WeakSet(), "loaded_at": time.time()}
+                    with self._lock:
+                        self._entries[digest] = entry
+                        self._building.pop(digest, None)
+
+        with self._lock:
+            # 잠금을 놓은 사이 다른 세션이 이 데이터셋을 제거했으면 다시 넣음 (그새 다시 읽힌 것이 있으면 그것을 사용)
+            current = self._entries.get(digest)
+            if current is None:
+                self._entries[digest] = entry
+            else:
+                entry = current
+            if lease.digest is not None and lease.digest != digest and lease.digest in self._entries:
+                self._entries[lease.digest]["leases"].discard(lease)
+            lease.digest = digest
+            entry["leases"].add(lease)
+            self._entries.move_to_end(digest)
+            self._evict()
+        return entry["index"]
+
+    def release(self, lease):
+        with self._lock:
+            if lease.digest in self._entries:
+                self._entries[lease.digest]["leases"].discard(lease)
+            lease.digest = None
+            self._evict()
+
+    def _evict(self):
+        idle = [digest for digest, entry in self._entries.items() if not entry["leases"]]
+        for digest in idle[:max(len(idle) - self.max_idle, 0)]:
+            del self._entries[digest]
+
+    def usage(self):
+        # 데이터셋별 행 수, 메모리(바이트), 참조 중인 세션 수
+        with self._lock:
+            entries = list(self._entries.items())
+        return pd.DataFrame(
+            [
+                {
+                    "digest": digest[:12],
+                    "rows": len(entry["index"].frame),
+                    "bytes": entry["index"].memory_usage(),
+                    "sessions": len(entry["leases"]),
+                }
+                for digest, entry in entries
+            ],
+            columns=["digest", "rows", "bytes", "sessions"],
+        )
+
+
+@st.cache_resource
+def get_dataset_registry():
+    return DatasetRegistry()
+
+
+def _read_with_progress(raw, name, digest):
+    miss()
+    bar = st.progress(0.0, text="파일을 읽는 중...")
+    try:
+        with stage("parse_file"):
+            df = read_energy_file(raw, name, progress=lambda done: bar.progress(done, text="파일을 읽는 중..."))
+    finally:
+        bar.empty()
+    return CountryIndex(df, digest)
+
+
+def load_country_index(uploaded_file):
+    # 같은 내용의 파일은 모든 세션이 레지스트리의 한 벌을 함께 사용
+    digest = file_digest(uploaded_file)
+    lease = st.session_state.setdefault(LEASE_KEY, DatasetLease())
+    with stage("load_dataset", cached=True):
+        return get_dataset_registry().acquire(
+            digest, lease, lambda: _read_with_progress(uploaded_file.getvalue(), uploaded_file.name, digest)
+        )
+
+
+def release_country_index():
+    # 업로드를 지운 세션은 데이터셋 참조를 놓아, 아무도 쓰지 않으면 MAX_IDLE_DATASETS 기준으로 제거되게 함
+    lease = st.session_state.get(LEASE_KEY)
+    if lease is not None and lease.digest is not None:
+        get_dataset_registry().release(lease)
+
+
+def show_memory_usage():
+    usage = get_dataset_registry().usage()
+    with st.sidebar.expander("공유 데이터 메모리"):
+        st.caption(f"데이터셋 {len(usage)}개, 총 {usage['bytes'].sum() / 2 ** 20:.1f} MB")
+        st.dataframe(usage, hide_index=True)
+
+
+@st.cache_data(max_entries=MAX_CACHED_FILES, show_spinner="Parquet로 변환하는 중...")
+def _parquet_export(digest, _df):
+    return to_parquet_bytes(_df)
+
+
+def parquet_export_button(uploaded_file, index):
+    # CSV 업로드일 때만: 정리된 데이터를 Parquet로 한 번 변환해 두면 다음부터 훨씬 빨리 읽힘
+    if file_format(uploaded_file.name) != "csv":
+        return
+    if st.checkbox("다음 분석을 위해 Parquet 파일로 변환하기"):
+        st.download_button(
+            "Parquet 파일 내려받기",
+            data=_parquet_export(index.digest, index.frame.reset_index()),
+            file_name=os.path.splitext(uploaded_file.name)[0] + ".parquet",
+            mime="application/octet-stream",
+        )
@@ -0,0 +1,247 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from charts import (
+    add_forecast_trace,
+    animated_choropleth_figure,
+    choropleth_figure,
+    country_colors,
+    metric_figure,
+    plotly_chart,
+    year_matrix,
+)
+from forecast_jobs import get_job_queue, show_job_table
+from forecasting import (
+    DEFAULT_MODEL,
+    FORECAST_STEPS,
+    FORECASTERS,
+    MAX_HORIZON,
+    MIN_YEARS,
+    TASK_TIMEOUT,
+    load_forecast_table,
+    table_path,
+)
+from instrumentation import miss, record_stage, stage
+
+# 에너지 페이지에서 위젯 하나가 바뀔 때 해당 구간만 다시 실행되도록 나눈 섹션들 (st.fragment).
+# 섹션 안의 위젯(예측 모델, 지도 연도)은 그 섹션만 다시 실행하고, 국가 선택처럼
+# 여러 섹션에 쓰이는 위젯만 페이지 전체를 다시 실행함.
+# 예측은 (데이터, 모델, 국가)마다 가장 긴 기간 하나만 기억하고, 더 짧은 기간은 앞부분을 잘라 씀.
+
+# 세션마다 기억해 둘 예측 결과 수 (데이터 x 모델 x 국가)
+MAX_SESSION_FORECASTS = 256
+
+
+def _forecast_controls():
+    # 빠른 모델은 모든 국가를 배열 연산 한 번으로 예측하고, ARIMA는 정확하지만 느림
+    model_key = st.selectbox("예측 모델", list(FORECASTERS), index=list(FORECASTERS).index(DEFAULT_MODEL),
+                             format_func=lambda key: FORECASTERS[key].label, key="energy_model")
+    steps = st.slider("예측 기간 (년)", 1, MAX_HORIZON, FORECAST_STEPS, key="energy_horizon")
+    if FORECASTERS[model_key].background:
+        show_job_table()
+    return model_key, FORECASTERS[model_key], steps
+
+
+def _remember(store, key, forecast_series):
+    store[key] = forecast_series
+    while len(store) > MAX_SESSION_FORECASTS:
+        store.pop(next(iter(store)))
+
+
+def session_forecasts(digest, model_key, series, steps=FORECAST_STEPS, progress=None):
+    """forecaster.forecast_many와 같은 (국가, 예측, 오류)를 끝나는 순서대로 yield.
+
+    이번 세션에서 steps 이상 예측한 (데이터, 모델, 국가)는 session_state에서 잘라 쓰고,
+    batch_forecast.py 테이블에 있는 국가도 바로 사용. 느린 모델은 백그라운드 작업 큐에 맡기고
+    progress(끝난 수, 전체 수)로 진행 상황을 알림. 다른 세션이 같은 예측을 요청 중이면 그 작업을 기다림.
+    """
+    store = st.session_state.setdefault("_energy_forecasts", {})
+    precomputed = load_forecast_table(table_path(digest, model_key))
+    # 계측: 국가별로 기억해 둔 예측은 적중, 새로 계산하거나 작업을 기다린 예측은 미스
+    stage_name = f"forecast_{model_key}"
+    remaining = {}
+    for country, ts in series.items():
+        cached = store.get((digest, model_key, country))
+        if (cached is None or len(cached) < steps) and precomputed is not None:
+            cached = precomputed.get(country)
+        if cached is not None and len(cached) >= steps:
+            record_stage(stage_name, 0.0, "hit")
+            yield country, cached.iloc[:steps], None
+        else:
+            remaining[country] = ts
+    if not remaining:
+        return
+
+    forecaster = FORECASTERS[model_key]
+    if not forecaster.background:
+        # 빠른 모델은 모든 국가를 한 번의 배열 연산으로 예측하므로 한꺼번에 받아도 늦어지지 않음
+        with stage(stage_name, cached=True):
+            miss()
+            results = list(forecaster.forecast_many(remaining, steps))
+        for country, forecast_series, error in results:
+            if error is None:
+                _remember(store, (digest, model_key, country), forecast_series)
+            yield country, forecast_series, error
+        return
+
+    queue = get_job_queue()
+    submitted_at = time.perf_counter()
+    jobs = {}
+    for country, ts in remaining.items():
+        jobs.setdefault(queue.submit(model_key, country, ts, steps), []).append(country)
+    # 다른 세션이 이미 끝낸 작업은 공유 작업표에서 바로 가져가므로 적중으로 기록
+    shared = {job for job in jobs if job.finished}
+
+    finished = 0
+    last_finished_at = time.time()
+    for job in queue.as_completed(list(jobs)):
+        if job is None:
+            if time.time() - last_finished_at > TASK_TIMEOUT:
+                break
+        else:
+            finished += 1
+            last_finished_at = time.time()
+            record_stage(stage_name, time.perf_counter() - submitted_at, "hit" if job in shared else "miss")
+            for country in jobs.pop(job):
+                if job.error is None:
+                    _remember(store, (digest, model_key, country), job.result)
+                yield country, job.result, job.error
+        if progress:
+            progress(finished, finished + len(jobs))
+
+    # 오래 걸리는 작업은 백그라운드에서 계속 실행되고, 다음 실행 때 결과를 가져감
+    for countries in jobs.values():
+        for country in countries:
+            yield country, None, TimeoutError("아직 예측 중입니다. 잠시 후 다시 실행하면 결과가 표시됩니다.")
+
+
+# 페이지 전체 실행 중에 미뤄 둔 예측 그리기 목록 (섹션만 다시 실행될 때는 없음).
+# session_state는 st.stop이나 재실행 요청 뒤에 읽고 쓸 수 없어, 실행 스레드에 두고 구간이 끝나면 항상 지움
+_local = threading.local()
+
+
+@contextmanager
+def deferred_forecasts():
+    """페이지 전체 실행 구간. 느린 예측은 기다리지 않고 아래 섹션부터 그린 뒤 구간 끝에서 채움."""
+    _local.deferred = []
+    try:
+        yield
+        # 미뤄 둔 예측을 기다리며 앞서 만든 자리(차트, 진행 막대)에 채워 넣음
+        for draw in _local.deferred:
+            draw()
+    finally:
+        # 중간에 끊겨도 목록을 지워, 뒤이은 섹션 재실행이 오래된 목록에 넣고 끝나지 않도록 함
+        _local.deferred = None
+
+
+def _run_or_defer(draw, background):
+    # 섹션만 다시 실행될 때(모델 변경)는 deferred_forecasts 구간 밖이므로 바로 기다림
+    deferred = getattr(_local, "deferred", None)
+    if background and deferred is not None:
+        deferred.append(draw)
+    else:
+        draw()
+
+
+def _progress_bar():
+    bar = st.empty()
+
+    def update(finished, total):
+        if finished >= total:
+            bar.empty()
+        else:
+            bar.progress(finished / total, text=f"예측 작업 {finished}/{total} 완료 (백그라운드에서 실행 중)")
+
+    return update
+
+
+def _show_error(container, country, error):
+    if isinstance(error, TimeoutError):
+        container.info(f"{country}: {error}")
+    else:
+        container.error(f"{country} 모델 훈련 오류: {error}")
+
+
+@st.fragment
+def forecast_section(index, country):
+    # 한 국가의 실제값 + 예측. 모델을 바꾸면 이 섹션만 다시 실행
+    model_key, forecaster, steps = _forecast_controls()
+    st.subheader(f"📈 {country}의 전력 소비 예측 ({forecaster.label})")
+
+    ts = index.get(country)["electricity_demand"]
+    if len(ts) < MIN_YEARS:
+        st.warning(f"⚠️ 예측을 위해 최소 {MIN_YEARS}개 이상의 연도 데이터가 필요합니다.")
+        return
+
+    # 실제값을 먼저 그리고, 예측이 끝나면 같은 자리에 예측을 더해 다시 그림
+    fig = metric_figure(index, [country], "demand", f"{country} - 전력 소비 예측", "전력 소비량 (TWh)")
+    chart = st.empty()
+    plotly_chart(fig, chart)
+    progress = _progress_bar()
+    messages = st.container()
+
+    def draw():
+        for _, forecast_series, error in session_forecasts(index.digest, model_key, {country: ts}, steps, progress):
+            if error is not None:
+                _show_error(messages, country, error)
+                return
+            add_forecast_trace(fig, f"예측 전력 소비 ({steps}년)", forecast_series, "red")
+            plotly_chart(fig, chart)
+
+    _run_or_defer(draw, forecaster.background)
+
+
+@st.fragment
+def forecast_compare_section(index, countries):
+    # 여러 국가의 실제값을 먼저 그리고, 예측은 끝나는 대로 추가. 모델을 바꾸면 이 섹션만 다시 실행
+    model_key, forecaster, steps = _forecast_controls()
+    st.subheader(f"📈 선택한 국가들의 전력 소비 예측 비교 ({forecaster.label})")
+
+    colors = country_colors(countries)
+    series = {}
+    for country in countries:
+        ts = index.get(country)["electricity_demand"]
+        if len(ts) < MIN_YEARS:
+            st.warning(f"⚠️ {country}의 데이터가 {MIN_YEARS}년 미만으로 예측을 할 수 없습니다.")
+            continue
+        series[country] = ts
+
+    fig = metric_figure(index, countries, "demand", f"선택 국가별 전력 소비 실제값 및 {steps}년 예측 비교", "전력 소비량 (TWh)")
+    chart = st.empty()
+    plotly_chart(fig, chart)
+
+    progress = _progress_bar()
+    messages = st.container()
+
+    # 예측: ARIMA는 백그라운드 작업으로 국가별 병렬 적합하고, 끝나는 대로 그래프에 추가
+    def draw():
+        for country, forecast_series, error in session_forecasts(index.digest, model_key, series, steps, progress):
+            if error is not None:
+                _show_error(messages, country, error)
+                continue
+            add_forecast_trace(fig, f"{country} 예측 ({steps}년)", forecast_series, colors[country])
+            plotly_chart(fig, chart)
+
+    _run_or_defer(draw, forecaster.background)
+
+
+@st.fragment
+def map_section(index):
+    # 지도 연도/애니메이션 위젯은 이 섹션만 다시 실행 (위쪽 예측과 차트는 그대로)
+    st.subheader("🌍 세계 국가별 전력 소비량 지도")
+
+    available_years = year_matrix(index).columns
+    animate = st.checkbox("모든 연도를 애니메이션 지도로 보기 (연도 이동 시 페이지를 다시 실행하지 않음)")
+    if animate:
+        map_fig = animated_choropleth_figure(index)
+    else:
+        map_year = st.slider("지도로 볼 연도 선택", int(available_years.min()), int(available_years.max()),
+                             int(available_years.max()))
+        if map_year not in available_years:
+            st.info(f"{map_year}년 데이터가 없습니다.")
+            return
+        map_fig = choropleth_figure(index, map_year)
+    plotly_chart(map_fig)
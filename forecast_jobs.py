@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+from forecasting import FORECAST_STEPS, FORECASTERS, default_workers, series_fingerprint
+
+# 동시에 실행할 예측 작업 수 (ARIMA 적합 자체는 작업 안에서 프로세스 풀을 사용할 수 있음)
+JOB_WORKERS_ENV = "FORECAST_JOB_WORKERS"
+# 끝난 작업을 작업표에 남겨 둘 시간(초)과 최대 개수
+JOB_TTL = 10 * 60
+MAX_JOBS = 1024
+# 페이지에서 진행 상황을 다시 그리는 간격(초)
+POLL_INTERVAL = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    # 작업표의 한 행. 같은 (모델, 시계열, 예측 기간)의 작업은 모든 세션이 하나를 공유
+    def __init__(self, key, model_key, name, steps):
+        self.id = uuid.uuid4().hex[:8]
+        self.key = key
+        self.model_key = model_key
+        self.name = name
+        self.steps = steps
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+class JobQueue:
+    """예측 작업을 스크립트 스레드 밖의 스레드 풀에서 실행하는 프로세스 단위 작업 큐.
+
+    실행 중이거나 끝난 같은 작업이 있으면 새로 만들지 않고 그 작업을 돌려줌.
+    실패한 작업은 돌려주지 않고 다시 실행해, 일시적인 실패가 모든 세션에 계속 보이지 않게 함.
+    """
+
+    def __init__(self, max_workers=None):
+        max_workers = max_workers or default_workers()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, model_key, name, ts, steps=FORECAST_STEPS):
+        key = (model_key, series_fingerprint(ts, (), steps))
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            self._jobs.pop(key, None)
+            job = Job(key, model_key, name, steps)
+            self._jobs[key] = job
+            job.future = self._executor.submit(self._run, job, ts)
+            return job
+
+    def _run(self, job, ts):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = FORECASTERS[job.model_key].forecast(ts, job.steps, name=job.name)
+            job.status = DONE
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # 오래된 완료 작업부터 제거 (실행 중인 작업은 남김)
+        now = time.time()
+        for key, job in list(self._jobs.items()):
+            if len(self._jobs) <= MAX_JOBS and not (job.finished and now - job.finished_at > JOB_TTL):
+                continue
+            if job.finished:
+                del self._jobs[key]
+
+    def as_completed(self, jobs, poll=POLL_INTERVAL):
+        """jobs가 끝나는 순서대로 yield. poll초 동안 끝난 작업이 없으면 None을 yield.
+
+        None은 페이지가 진행 상황을 다시 그리고, 다른 위젯 조작으로 재실행될 수 있게 하는 틈.
+        """
+        pending = {}
+        for job in jobs:
+            if job.finished:
+                yield job
+            else:
+                pending[job.future] = job
+        while pending:
+            done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            if not done:
+                yield None
+            for future in done:
+                yield pending.pop(future)
+
+    def table(self):
+        # 작업표: 모델, 이름, 상태, 대기/실행 시간(초)
+        now = time.time()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return pd.DataFrame(
+            [
+                {
+                    "id": job.id,
+                    "model": job.model_key,
+                    "name": job.name,
+                    "status": job.status,
+                    "waited": round((job.started_at or now) - job.submitted_at, 2),
+                    "ran": round((job.finished_at or now) - job.started_at, 2) if job.started_at else None,
+                }
+                for job in jobs
+            ],
+            columns=["id", "model", "name", "status", "waited", "ran"],
+        )
+
+
+@st.cache_resource
+def get_job_queue():
+    # 모든 세션이 같은 작업 큐를 공유해 같은 예측을 중복 실행하지 않음
+    return JobQueue(int(os.environ.get(JOB_WORKERS_ENV, 0)) or None)
+
+
+def show_job_table():
+    table = get_job_queue().table()
+    with st.sidebar.expander("예측 작업 현황"):
+        counts = table["status"].value_counts()
+        st.caption(" · ".join(f"{status} {counts.get(status, 0)}" for status in (QUEUED, RUNNING, DONE, FAILED)))
+        st.dataframe(table, hide_index=True)
@@ -0,0 +1,672 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ORDER = (1, 1, 1)
+FORECAST_STEPS = 10
+# 페이지에서 고를 수 있는 가장 긴 예측 기간 (년)
+MAX_HORIZON = 30
+MIN_YEARS = 10
+
+# 메모리에 보관할 예측 결과 수 (초과하면 가장 오래 안 쓴 것부터 제거)
+MAX_CACHED_FORECASTS = 512
+# 이 환경변수에 디렉터리를 지정하면 예측 결과를 디스크에도 저장 (재시작 후에도 재사용)
+CACHE_DIR_ENV = "FORECAST_CACHE_DIR"
+# 자동 차수 탐색에서 시도할 (p, d, q) 후보 범위와 선택 기준
+ORDER_GRID = ((0, 1, 2), (0, 1, 2), (0, 1, 2))
+ORDER_CRITERIA = ("aic", "bic")
+# 차분 차수 d는 KPSS 검정(유의수준)으로 먼저 정함. d가 다르면 우도를 계산하는 관측치 수가 달라 AIC/BIC를 비교할 수 없음
+KPSS_ALPHA = 0.05
+# 일괄 예측 테이블(batch_forecast.py 결과)을 찾을 디렉터리
+TABLE_DIR_ENV = "FORECAST_TABLE_DIR"
+DEFAULT_TABLE_DIR = "forecast_tables"
+# 캐시된 시계열 뒤에 이 연도 수 이하로 새 값이 붙은 경우, 재적합 없이 기존 계수로 상태만 갱신
+MAX_APPEND_YEARS = 5
+# 여러 국가를 동시에 예측할 때 사용할 프로세스 수 (기본값: CPU 코어 수)
+WORKERS_ENV = "FORECAST_WORKERS"
+# 이 시간(초) 동안 어떤 작업도 끝나지 않으면 남은 작업은 시간 초과로 처리
+TASK_TIMEOUT = 60
+# 예측 결과 열: 점 예측과 80%/95% 예측 구간
+INTERVALS = (80, 95)
+FORECAST_COLUMNS = ["forecast", "lower_80", "upper_80", "lower_95", "upper_95"]
+# 정규분포 양측 구간의 z 값 (scipy를 불러오지 않도록 상수로 둠)
+Z_SCORES = {80: 1.2815515655446004, 95: 1.959963984540054}
+
+
+def series_fingerprint(ts, order=DEFAULT_ORDER, steps=FORECAST_STEPS):
+    # 값 + 연도 + 모델 차수 + 예측 기간으로 캐시 키 생성
+    h = hashlib.sha256()
+    h.update(np.asarray(ts, dtype="float64").tobytes())
+    h.update(np.asarray(ts.index.year, dtype="int64").tobytes())
+    h.update(repr((tuple(order), steps)).encode())
+    return h.hexdigest()
+
+
+class ForecastCache:
+    def __init__(self, max_entries=MAX_CACHED_FORECASTS, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if not self.cache_dir:
+            return None
+        try:
+            values = np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+        self._remember(key, values)
+        return values
+
+    def put(self, key, values):
+        self._remember(key, values)
+        if self.cache_dir:
+            # 임시 파일에 쓴 뒤 교체해서 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 함
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key, values):
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+forecast_cache = ForecastCache(cache_dir=os.environ.get(CACHE_DIR_ENV))
+# 시계열별로 선택된 ARIMA 차수 (p, d, q)
+order_cache = ForecastCache(cache_dir=os.environ.get(CACHE_DIR_ENV))
+# 시계열별 ARIMA 적합 계수 (새 연도가 덧붙었을 때 재사용)
+params_cache = ForecastCache(cache_dir=os.environ.get(CACHE_DIR_ENV))
+
+
+def forecast_index(ts, steps=FORECAST_STEPS):
+    last_year = ts.index.max().year
+    return pd.date_range(start=f"{last_year + 1}", periods=steps, freq="YS")
+
+
+def params_key(ts, order=DEFAULT_ORDER):
+    return series_fingerprint(ts, order, "params")
+
+
+def forecast_key(ts, order=DEFAULT_ORDER):
+    # 예측 기간은 키에 넣지 않음: 가장 길게 계산한 예측을 저장하고 짧은 요청은 잘라서 응답
+    return series_fingerprint(ts, order, "forecast")
+
+
+def forecast_frame(ts, values):
+    # (기간, 5) 배열 -> 연도 인덱스의 FORECAST_COLUMNS 데이터프레임
+    return pd.DataFrame(values, index=forecast_index(ts, len(values)), columns=FORECAST_COLUMNS)
+
+
+def with_intervals(mean, se):
+    # 점 예측과 표준오차로 (..., 기간, 5) 배열을 만듦
+    columns = [mean]
+    for level in INTERVALS:
+        columns += [mean - Z_SCORES[level] * se, mean + Z_SCORES[level] * se]
+    return np.stack(columns, axis=-1)
+
+
+def _summarize(model_fit, steps):
+    # 한 번의 get_forecast 결과에서 점 예측과 모든 구간을 함께 꺼냄 (forecast()도 내부적으로 같은 계산)
+    prediction = model_fit.get_forecast(steps=steps)
+    columns = [np.asarray(prediction.predicted_mean)]
+    for level in INTERVALS:
+        bounds = np.asarray(prediction.conf_int(alpha=1 - level / 100))
+        columns += [bounds[:, 0], bounds[:, 1]]
+    return np.column_stack(columns)
+
+
+def _fit_forecast(values, order, steps):
+    # 프로세스 풀에서도 실행되므로 모듈 최상위 함수로 둠. ((기간, 5) 예측 배열, 적합 계수)를 반환
+    # statsmodels는 불러오는 데 1초 이상 걸리므로 ARIMA를 실제로 적합할 때만 가져옴
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model_fit = ARIMA(values, order=order).fit()
+    return _summarize(model_fit, steps), np.asarray(model_fit.params)
+
+
+def _extend_forecast(ts, order, steps):
+    """ts 자체나 ts에서 뒤쪽 연도만 뺀 시계열의 계수가 캐시에 있으면 그 계수로 예측.
+
+    같은 시계열에서 더 긴 기간을 요청한 경우(덧붙인 연도 0개)도 포함.
+    results.append(refit=False)와 같이 칼만 필터만 다시 돌리고 MLE 적합은 하지 않음.
+    (예측 배열, None)을 반환하며 계수는 새로 저장하지 않음: 마지막으로 실제 적합한 시계열보다
+    MAX_APPEND_YEARS를 넘게 덧붙으면 다시 적합하도록. 해당하는 캐시가 없으면 None.
+    """
+    for appended in range(0, min(MAX_APPEND_YEARS, len(ts) - 2) + 1):
+        params = params_cache.get(params_key(ts.iloc[:len(ts) - appended], order))
+        if params is None:
+            continue
+        from statsmodels.tsa.arima.model import ARIMA
+
+        try:
+            model_fit = ARIMA(np.asarray(ts, dtype="float64"), order=order).filter(params)
+        except Exception:
+            return None
+        return _summarize(model_fit, steps), None
+    return None
+
+
+def _cached_forecast(ts, order, steps):
+    # 캐시된 예측이 steps 이상이면 앞부분만 잘라서 반환
+    values = forecast_cache.get(forecast_key(ts, order))
+    if values is None or values.ndim != 2 or len(values) < steps:
+        return None
+    return values[:steps]
+
+
+def _store_fit(ts, order, values, params=None):
+    # 계수는 MLE로 실제 적합했을 때만 저장 (params=None이면 예측만 저장)
+    forecast_cache.put(forecast_key(ts, order), values)
+    if params is not None:
+        params_cache.put(params_key(ts, order), params)
+
+
+def forecast_arima(ts, order=DEFAULT_ORDER, steps=FORECAST_STEPS):
+    values = _cached_forecast(ts, order, steps)
+    if values is None:
+        fitted = _extend_forecast(ts, order, steps) or _fit_forecast(np.asarray(ts, dtype="float64"), order, steps)
+        values = fitted[0]
+        _store_fit(ts, order, *fitted)
+
+    return forecast_frame(ts, values)
+
+
+def default_workers():
+    return int(os.environ.get(WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=None):
+    # 프로세스 풀은 한 번 만들어 재사용 (rerun마다 새로 띄우지 않음)
+    global _executor, _executor_workers
+    max_workers = max_workers or default_workers()
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            # 스트림릿 서버는 여러 스레드가 도는 중이라 fork로 띄우면 다른 스레드가 잡고 있던 락을 물려받아
+            # 자식이 멈출 수 있음. 단일 스레드인 forkserver(없으면 spawn)에서 작업 프로세스를 만듦
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+            _executor_workers = max_workers
+        return _executor
+
+
+def _reset_executor(cancel=True):
+    # 다음 요청부터 새 풀을 씀. cancel=False이면 이전 풀에 대기 중인 다른 세션의 작업은 그대로 실행
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=cancel)
+        _executor = None
+
+
+def _cancel_timed_out(futures):
+    # 이미 실행 중인 적합은 취소할 수 없어 작업 프로세스를 계속 차지하므로, 풀을 새로 만들어
+    # 이후 요청이 멈춘 프로세스를 기다리지 않게 함 (멈춘 프로세스는 적합이 끝나야 종료됨)
+    running = [future for future in futures if not future.cancel()]
+    if running:
+        _reset_executor(cancel=False)
+
+
+def forecast_many(series, order=DEFAULT_ORDER, steps=FORECAST_STEPS, max_workers=None, timeout=TASK_TIMEOUT):
+    """{이름: 시계열}을 받아 끝나는 순서대로 (이름, 예측 데이터프레임, 오류)를 yield.
+
+    국가별 오류는 서로 영향을 주지 않으며, 실패한 국가는 예측 대신 오류를 돌려줌.
+    """
+    pending = {}
+    for name, ts in series.items():
+        values = _cached_forecast(ts, order, steps)
+        if values is None:
+            # 계수가 캐시된 시계열(더 긴 기간 요청, 새 연도만 덧붙음)은 풀에 보내지 않고 바로 상태만 갱신
+            extended = _extend_forecast(ts, order, steps)
+            if extended is not None:
+                _store_fit(ts, order, *extended)
+                values = extended[0]
+
+        if values is not None:
+            yield name, forecast_frame(ts, values), None
+        else:
+            pending[name] = ts
+
+    if not pending:
+        return
+
+    max_workers = max_workers or default_workers()
+    if max_workers == 1:
+        for name, ts in pending.items():
+            try:
+                yield name, forecast_arima(ts, order, steps), None
+            except Exception as e:
+                yield name, None, e
+        return
+
+    # 한 건만 남아도 풀로 보냄: 페이지의 예측 작업(forecast_jobs.py)은 서버 프로세스의 스레드에서
+    # 국가별로 실행되므로, 여기서 바로 적합하면 모든 세션이 GIL 하나를 두고 경쟁함
+    executor = get_executor(max_workers)
+    futures = {
+        executor.submit(_fit_forecast, np.asarray(ts, dtype="float64"), order, steps): name
+        for name, ts in pending.items()
+    }
+    while futures:
+        done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            _cancel_timed_out(futures)
+            for name in futures.values():
+                yield name, None, TimeoutError(f"{timeout}초 안에 예측이 끝나지 않았습니다.")
+            return
+
+        for future in done:
+            name = futures.pop(future)
+            ts = pending[name]
+            try:
+                values, params = future.result()
+            except BrokenProcessPool as e:
+                _reset_executor()
+                yield name, None, e
+                continue
+            except Exception as e:
+                yield name, None, e
+                continue
+            _store_fit(ts, order, values, params)
+            yield name, forecast_frame(ts, values), None
+
+
+def _fit_candidate(values, order, steps, criterion, warm_params=None):
+    # 후보 차수 하나를 적합. 수렴하지 않거나 기준값이 발산하면 None
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model = ARIMA(values, order=order)
+    start_params = None
+    if warm_params:
+        # 이전 최적 모형의 계수로 시작하고, 새로 생긴 계수는 0(상수는 평균, 분산은 표본분산)으로 채움
+        defaults = {"const": values.mean(), "sigma2": values.var()}
+        start_params = np.array([warm_params.get(name, defaults.get(name, 0.0)) for name in model.param_names])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model_fit = model.fit(start_params=start_params)
+
+    retvals = getattr(model_fit, "mle_retvals", None) or {}
+    score = getattr(model_fit, criterion)
+    if not retvals.get("converged", True) or not np.isfinite(score):
+        return None
+    params = dict(zip(model.param_names, np.asarray(model_fit.params)))
+    return score, params, _summarize(model_fit, steps)
+
+
+def _fit_candidates(values, orders, steps, criterion, warm_params, max_workers, timeout):
+    # {차수: (기준값, 계수, 예측) 또는 None}
+    if len(orders) == 1 or max_workers == 1:
+        results = {}
+        for order in orders:
+            try:
+                results[order] = _fit_candidate(values, order, steps, criterion, warm_params)
+            except Exception:
+                results[order] = None
+        return results
+
+    executor = get_executor(max_workers)
+    futures = {
+        executor.submit(_fit_candidate, values, order, steps, criterion, warm_params): order
+        for order in orders
+    }
+    done, not_done = wait(futures, timeout=timeout)
+    results = {}
+    _cancel_timed_out(not_done)
+    for future in not_done:
+        results[futures[future]] = None
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except BrokenProcessPool:
+            _reset_executor()
+            results[futures[future]] = None
+        except Exception:
+            results[futures[future]] = None
+    return results
+
+
+def select_d(values, candidates):
+    # 차분한 시계열이 KPSS 검정에서 정상성이 기각되지 않는 가장 작은 d. 모두 기각되면 가장 큰 d
+    from statsmodels.tsa.stattools import kpss
+
+    candidates = sorted(candidates)
+    for d in candidates:
+        diffed = np.diff(values, n=d)
+        if len(diffed) < 3 or np.ptp(diffed) == 0:
+            # 검정할 수 없을 만큼 짧거나 상수가 된 경우는 이미 정상으로 봄
+            return d
+        with warnings.catch_warnings():
+            # p값이 표의 범위를 벗어나면 경계값을 돌려주며 경고함
+            warnings.simplefilter("ignore")
+            p_value = kpss(diffed, regression="c", nlags="auto")[1]
+        if p_value >= KPSS_ALPHA:
+            return d
+    return candidates[-1]
+
+
+def select_order(ts, criterion="aic", grid=ORDER_GRID, steps=FORECAST_STEPS, max_workers=None, timeout=TASK_TIMEOUT):
+    """AIC/BIC 기준으로 grid 안에서 ARIMA 차수를 고름.
+
+    d는 select_d로 먼저 정하고, 그 d에서 (p, q)만 기준값으로 비교함.
+    p + q가 작은 후보부터 한 단계씩 병렬로 적합하고, 다음 단계는 지금까지의 최적 계수로 warm start.
+    한 단계에서 개선이 없으면 더 복잡한 후보는 시도하지 않음. 선택된 차수는 시계열별로 캐시됨.
+    """
+    if criterion not in ORDER_CRITERIA:
+        raise ValueError(f"criterion은 {ORDER_CRITERIA} 중 하나여야 합니다.")
+
+    grid = tuple(tuple(values) for values in grid)
+    # 고른 차수는 예측 기간과 무관하므로 기간은 키에 넣지 않음
+    key = series_fingerprint(ts, ("auto", "kpss", criterion, grid), "order")
+    cached = order_cache.get(key)
+    if cached is not None:
+        return tuple(int(v) for v in cached)
+
+    values = np.asarray(ts, dtype="float64")
+    max_workers = max_workers or default_workers()
+    d = select_d(values, grid[1])
+    rounds = {}
+    for p in grid[0]:
+        for q in grid[2]:
+            # 차분 후 남는 관측치보다 계수가 많으면 적합할 수 없으므로 제외
+            if p + q + d < len(values) - 1:
+                rounds.setdefault(p + q, []).append((p, d, q))
+
+    best = None
+    for complexity in sorted(rounds):
+        warm_params = best[2] if best is not None else None
+        results = _fit_candidates(values, rounds[complexity], steps, criterion, warm_params, max_workers, timeout)
+        fitted = [(result[0], order, result[1], result[2]) for order, result in results.items() if result is not None]
+        if not fitted:
+            continue
+
+        round_best = min(fitted, key=lambda item: item[0])
+        if best is not None and round_best[0] >= best[0]:
+            break
+        best = (round_best[0], round_best[1], round_best[2], round_best[3])
+
+    if best is None:
+        raise ValueError("적합 가능한 ARIMA 차수를 찾지 못했습니다.")
+
+    _, order, params, forecast_values = best
+    order_cache.put(key, np.array(order))
+    # 탐색 중 얻은 최적 모형의 예측과 계수도 그대로 캐시해서 다시 적합하지 않도록 함
+    _store_fit(ts, order, forecast_values, np.array(list(params.values())))
+    return order
+
+
+class Forecaster:
+    # 예측 모델 공통 인터페이스. forecast_many는 (이름, 예측 데이터프레임(FORECAST_COLUMNS), 오류)를 yield
+    key = None
+    label = None
+    # True이면 페이지에서 백그라운드 작업 큐(forecast_jobs.py)로 실행 (느린 모델)
+    background = False
+
+    def forecast(self, ts, steps=FORECAST_STEPS, precomputed=None, name=None):
+        # 단일 시계열 예측. 실패하면 예외 발생
+        for _, forecast_series, error in self.forecast_many({name: ts}, steps, precomputed):
+            if error is not None:
+                raise error
+            return forecast_series
+
+    def forecast_many(self, series, steps=FORECAST_STEPS, precomputed=None, **options):
+        # precomputed({이름: 예측 데이터프레임})에 있는 국가는 모델을 적합하지 않고 앞부분만 잘라서 사용
+        remaining = {}
+        for name, ts in series.items():
+            if precomputed is not None and name in precomputed and len(precomputed[name]) >= steps:
+                yield name, precomputed[name].iloc[:steps], None
+            else:
+                remaining[name] = ts
+
+        if remaining:
+            yield from self._forecast_many(remaining, steps, **options)
+
+    def _forecast_many(self, series, steps, **options):
+        raise NotImplementedError
+
+
+class ArimaForecaster(Forecaster):
+    key = "arima"
+    label = "ARIMA (정확, 느림)"
+    background = True
+
+    def __init__(self, order=DEFAULT_ORDER):
+        self.order = order
+
+    def _forecast_many(self, series, steps, max_workers=None, timeout=TASK_TIMEOUT):
+        return forecast_many(series, self.order, steps, max_workers, timeout)
+
+
+class AutoArimaForecaster(Forecaster):
+    key = "arima_auto"
+    label = "ARIMA 자동 차수 (가장 느림)"
+    background = True
+
+    def __init__(self, criterion="aic", grid=ORDER_GRID):
+        self.criterion = criterion
+        self.grid = grid
+
+    def _forecast_many(self, series, steps, max_workers=None, timeout=TASK_TIMEOUT):
+        # 국가별로 차수를 고르고(후보 적합은 병렬), 고른 차수의 예측은 탐색 중 캐시된 값을 사용
+        for name, ts in series.items():
+            try:
+                order = select_order(ts, self.criterion, self.grid, steps, max_workers, timeout)
+                yield name, forecast_arima(ts, order, steps), None
+            except Exception as e:
+                yield name, None, e
+
+
+class ArrayForecaster(Forecaster):
+    # NumPy 배열 연산으로 모든 국가를 한 번에 예측하는 가벼운 모델
+
+    def predict(self, values, steps):
+        """values: (국가 수, 연도 수) 배열. 각 행은 오른쪽 정렬되어 있고 앞쪽 빈칸은 NaN.
+
+        (국가 수, steps) 점 예측과 같은 모양의 예측 표준오차를 반환.
+        """
+        raise NotImplementedError
+
+    def _forecast_many(self, series, steps, **options):
+        names = list(series)
+        width = max(len(ts) for ts in series.values())
+        values = np.full((len(names), width), np.nan)
+        for row, name in enumerate(names):
+            ts = series[name]
+            if len(ts):
+                values[row, width - len(ts):] = np.asarray(ts, dtype="float64")
+
+        counts = (~np.isnan(values)).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean, se = self.predict(values, steps)
+            predictions = with_intervals(mean, se)
+
+        for row, name in enumerate(names):
+            if counts[row] < 2 or not np.isfinite(mean[row]).all():
+                yield name, None, ValueError("예측에 필요한 데이터가 부족합니다.")
+                continue
+            yield name, forecast_frame(series[name], predictions[row]), None
+
+
+def _first_valid(values):
+    valid = ~np.isnan(values)
+    first = valid.argmax(axis=1)
+    return valid, first, values[np.arange(len(values)), first]
+
+
+class DriftForecaster(ArrayForecaster):
+    key = "drift"
+    label = "드리프트 (빠름)"
+
+    def predict(self, values, steps):
+        valid, first, first_values = _first_valid(values)
+        n = valid.sum(axis=1)
+        slope = (values[:, -1] - first_values) / (n - 1)
+        h = np.arange(1, steps + 1)
+
+        # 연간 증감의 잔차 분산으로 구간 계산 (드리프트 추정 오차 포함)
+        residuals = np.diff(values, axis=1) - slope[:, None]
+        sigma = np.sqrt(np.nansum(residuals ** 2, axis=1) / (n - 2))
+        se = sigma[:, None] * np.sqrt(h * (1 + h / (n[:, None] - 1)))
+        return values[:, -1:] + slope[:, None] * h, se
+
+
+class HoltForecaster(ArrayForecaster):
+    key = "holt"
+    label = "Holt 지수평활 (빠름)"
+
+    def __init__(self, alpha=0.8, beta=0.2):
+        self.alpha = alpha
+        self.beta = beta
+
+    def predict(self, values, steps):
+        valid, first, level = _first_valid(values)
+        rows = np.arange(len(values))
+        second = np.minimum(first + 1, values.shape[1] - 1)
+        trend = np.nan_to_num(values[rows, second] - level)
+
+        # 시간 방향으로만 반복하고 국가 방향은 벡터 연산. 한 단계 앞 예측 오차도 함께 누적
+        sse = np.zeros(len(values))
+        for t in range(values.shape[1]):
+            active = valid[:, t] & (t > first)
+            y = values[:, t]
+            sse += np.where(active, (y - level - trend) ** 2, 0.0)
+            new_level = self.alpha * y + (1 - self.alpha) * (level + trend)
+            new_trend = self.beta * (new_level - level) + (1 - self.beta) * trend
+            level = np.where(active, new_level, level)
+            trend = np.where(active, new_trend, trend)
+
+        # Holt 선형 모형의 h단계 예측 분산: sigma^2 * (1 + sum_{j<h} alpha^2 (1 + j beta)^2)
+        sigma = np.sqrt(sse / (valid.sum(axis=1) - 2))
+        j = np.arange(steps)
+        growth = np.cumsum(np.where(j > 0, self.alpha ** 2 * (1 + j * self.beta) ** 2, 0.0))
+        se = sigma[:, None] * np.sqrt(1 + growth)
+        return level[:, None] + trend[:, None] * np.arange(1, steps + 1), se
+
+
+class TrendForecaster(ArrayForecaster):
+    key = "trend"
+    label = "선형 추세 (빠름)"
+
+    def predict(self, values, steps):
+        # 국가별 최소제곱 직선을 닫힌 형태로 한 번에 계산
+        valid = ~np.isnan(values)
+        y = np.nan_to_num(values)
+        x = np.arange(values.shape[1], dtype="float64")
+        n = valid.sum(axis=1)
+        x_mean = (valid * x).sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = (x - x_mean[:, None]) * valid
+        sxx = (dx ** 2).sum(axis=1)
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / sxx
+        future_x = values.shape[1] - 1 + np.arange(1, steps + 1)
+
+        # 회귀 잔차로 예측 구간 계산 (직선 추정 오차 포함)
+        fitted = y_mean[:, None] + slope[:, None] * (x - x_mean[:, None])
+        sigma = np.sqrt((((y - fitted) * valid) ** 2).sum(axis=1) / (n - 2))
+        se = sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + (future_x - x_mean[:, None]) ** 2 / sxx[:, None])
+        return y_mean[:, None] + slope[:, None] * (future_x - x_mean[:, None]), se
+
+
+FORECASTERS = {
+    f.key: f
+    for f in (HoltForecaster(), TrendForecaster(), DriftForecaster(), ArimaForecaster(), AutoArimaForecaster())
+}
+DEFAULT_MODEL = "holt"
+
+
+def table_path(digest, model=DEFAULT_MODEL, table_dir=None):
+    table_dir = table_dir or os.environ.get(TABLE_DIR_ENV, DEFAULT_TABLE_DIR)
+    return os.path.join(table_dir, f"{digest}-{model}.parquet")
+
+
+def build_forecast_table(index, model=DEFAULT_MODEL, steps=FORECAST_STEPS, max_workers=None, timeout=TASK_TIMEOUT):
+    # 데이터가 MIN_YEARS 이상인 모든 국가를 예측해 (country, year, FORECAST_COLUMNS..., model) 긴 형식 테이블로 반환
+    series = {}
+    for country in index.countries:
+        ts = index.get(country)["electricity_demand"]
+        if len(ts) >= MIN_YEARS:
+            series[country] = ts
+
+    arima_models = (ArimaForecaster.key, AutoArimaForecaster.key)
+    options = {"max_workers": max_workers, "timeout": timeout} if model in arima_models else {}
+    frames = []
+    errors = {}
+    for country, forecast_series, error in FORECASTERS[model].forecast_many(series, steps, **options):
+        if error is not None:
+            errors[country] = error
+            continue
+        frame = forecast_series.rename_axis("year").reset_index()
+        frame.insert(0, "country", country)
+        frames.append(frame)
+
+    if frames:
+        table = pd.concat(frames, ignore_index=True).sort_values(["country", "year"], ignore_index=True)
+    else:
+        table = pd.DataFrame({"country": [], "year": pd.to_datetime([]), **{col: [] for col in FORECAST_COLUMNS}})
+    table["model"] = model
+    return table, errors
+
+
+def write_forecast_table(table, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".feather"):
+        table.to_feather(path)
+    else:
+        table.to_parquet(path, index=False)
+
+
+_tables = {}
+
+
+def load_forecast_table(path):
+    # {국가: 예측 데이터프레임}. 파일이 없으면 None (수정 시각이 같으면 다시 읽지 않음)
+    # 구간 열이 없는 예전 테이블은 구간을 NaN으로 채움
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _tables.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    table = pd.read_feather(path) if path.endswith(".feather") else pd.read_parquet(path)
+    forecasts = {
+        str(country): group.set_index(pd.DatetimeIndex(group["year"])).reindex(columns=FORECAST_COLUMNS)
+        for country, group in table.groupby("country", sort=False)
+    }
+    _tables[path] = (mtime, forecasts)
+    return forecasts
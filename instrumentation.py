@@ -0,0 +1,363 @@
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# 페이지 실행의 주요 단계(파일 읽기, 국가 조회, 모델 적합, 차트 생성/전송, 주가 조회)마다
+# 걸린 시간, 메모리 변화, 캐시 적중 여부를 기록.
+# 페이지는 맨 위에서 begin_run(__file__), 맨 아래에서 finish_run()을 호출하고,
+# 각 모듈은 느린 구간을 stage("이름")으로 감쌈.
+
+# "1"이면 모든 페이지에 계측 사이드바를 표시 (주소에 ?debug=1을 붙여도 됨)
+DEBUG_ENV = "PERF_DEBUG"
+# 지정하면 페이지 실행마다 단계 기록을 JSON 한 줄씩 이 파일에 추가
+LOG_PATH_ENV = "PERF_LOG"
+# 지정하면 누적 지표를 Prometheus 텍스트 형식으로 이 파일에 씀 (node_exporter textfile 수집기용)
+METRICS_PATH_ENV = "PERF_METRICS_PATH"
+# 한 번의 실행에서 보관할 단계 기록 수 (국가별 조회처럼 많이 반복되는 단계는 누적 지표에만 반영)
+MAX_RUN_STAGES = 500
+# 프로파일 요약에 보여 줄 함수 수
+PROFILE_LINES = 40
+# Prometheus 지표 이름 앞에 붙이는 접두사
+METRIC_PREFIX = "app"
+
+RUN_KEY = "_perf_run"
+PROFILE_REQUEST_KEY = "_perf_profile_next"
+PROFILE_RESULT_KEY = "_perf_profile"
+
+logger = logging.getLogger("perf")
+if os.environ.get(LOG_PATH_ENV) and not logger.handlers:
+    _handler = logging.FileHandler(os.environ[LOG_PATH_ENV], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_local = threading.local()
+
+
+def _rss():
+    # 현재 프로세스의 상주 메모리(바이트). /proc이 없는 환경에서는 None
+    # 프로세스 전체 값이라 다른 세션이 동시에 실행 중이면 그만큼 섞여 들어감
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _memory_delta(before, after):
+    return None if before is None or after is None else after - before
+
+
+class Metrics:
+    """프로세스 전체의 (페이지, 단계)별 누적 지표. 모든 세션과 백그라운드 스레드를 합산."""
+
+    def __init__(self):
+        self._stages = {}
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, page, record):
+        with self._lock:
+            entry = self._stages.setdefault((page, record["stage"]), {
+                "count": 0, "seconds": 0.0, "max_seconds": 0.0, "max_memory": 0, "hits": 0, "misses": 0,
+            })
+            entry["count"] += 1
+            entry["seconds"] += record["seconds"]
+            entry["max_seconds"] = max(entry["max_seconds"], record["seconds"])
+            if record["memory"] is not None:
+                entry["max_memory"] = max(entry["max_memory"], record["memory"])
+            if record["cache"] == "hit":
+                entry["hits"] += 1
+            elif record["cache"] == "miss":
+                entry["misses"] += 1
+
+    def add_run(self, page, seconds):
+        with self._lock:
+            entry = self._runs.setdefault(page, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def table(self, page=None):
+        # 단계별 실행 수, 평균/최대 시간(초), 최대 메모리 증가(MB), 캐시 적중/미스 수
+        # pandas는 디버그 표를 만들 때만 필요하므로 여기서 가져옴 (추천 페이지는 pandas 없이 시작)
+        import pandas as pd
+
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._stages.items()]
+        return pd.DataFrame(
+            [
+                {
+                    "page": stage_page,
+                    "stage": name,
+                    "count": entry["count"],
+                    "mean_s": round(entry["seconds"] / entry["count"], 4),
+                    "max_s": round(entry["max_seconds"], 4),
+                    "max_memory_mb": round(entry["max_memory"] / 2 ** 20, 2),
+                    "hits": entry["hits"],
+                    "misses": entry["misses"],
+                }
+                for (stage_page, name), entry in items
+                if page is None or stage_page == page
+            ],
+            columns=["page", "stage", "count", "mean_s", "max_s", "max_memory_mb", "hits", "misses"],
+        )
+
+    def prometheus(self):
+        # Prometheus 텍스트 노출 형식
+        with self._lock:
+            stages = sorted((key, dict(entry)) for key, entry in self._stages.items())
+            runs = sorted((page, dict(entry)) for page, entry in self._runs.items())
+
+        def labels(**values):
+            return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in values.items()) + "}"
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_page_run_seconds Wall time of a full page run.",
+            f"# TYPE {METRIC_PREFIX}_page_run_seconds summary",
+        ]
+        for page, entry in runs:
+            lines.append(f"{METRIC_PREFIX}_page_run_seconds_sum{labels(page=page)} {entry['seconds']:.6f}")
+            lines.append(f"{METRIC_PREFIX}_page_run_seconds_count{labels(page=page)} {entry['count']}")
+
+        families = [
+            ("stage_seconds", "summary", "Wall time spent in an instrumented stage.", None),
+            ("stage_max_seconds", "gauge", "Slowest observed run of a stage.", "max_seconds"),
+            ("stage_max_memory_delta_bytes", "gauge", "Largest resident memory increase during a stage.", "max_memory"),
+            ("stage_cache_hits_total", "counter", "Stage runs served from a cache.", "hits"),
+            ("stage_cache_misses_total", "counter", "Stage runs that had to compute.", "misses"),
+        ]
+        for name, kind, description, field in families:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for (page, stage_name), entry in stages:
+                label = labels(page=page, stage=stage_name)
+                if field is None:
+                    lines.append(f"{METRIC_PREFIX}_{name}_sum{label} {entry['seconds']:.6f}")
+                    lines.append(f"{METRIC_PREFIX}_{name}_count{label} {entry['count']}")
+                else:
+                    lines.append(f"{METRIC_PREFIX}_{name}{label} {entry[field]}")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스마다 하나 (모듈은 페이지를 다시 실행해도 다시 불러오지 않음)
+metrics = Metrics()
+
+
+class PageRun:
+    # 한 번의 페이지 실행 기록. session_state에 두고 같은 세션의 단계 기록을 모음
+    def __init__(self, page):
+        self.page = page
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.rss = _rss()
+        self.stages = []
+        self.profiler = None
+        self.finished = False
+
+
+def _current_run():
+    # 스크립트 스레드가 아닌 곳(백그라운드 작업, 스레드 풀, 명령줄 도구)에서는 None
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get(RUN_KEY)
+
+
+def _open_stages():
+    if not hasattr(_local, "stages"):
+        _local.stages = []
+    return _local.stages
+
+
+def _record(record):
+    run = _current_run()
+    metrics.add_stage(run.page if run is not None else "background", record)
+    if run is not None and not run.finished:
+        # 페이지 전체 실행이 끝난 뒤의 부분 재실행(st.fragment)은 누적 지표에만 반영
+        run.last = time.perf_counter()
+        if len(run.stages) < MAX_RUN_STAGES:
+            run.stages.append(record)
+
+
+@contextmanager
+def stage(name, cached=False, memory=True):
+    """name 단계의 걸린 시간, 메모리 변화, 캐시 적중 여부를 기록.
+
+    cached=True이면 적중으로 기록하고, 안쪽에서 miss()가 호출되면 미스로 기록
+    (st.cache_data 함수 본문에 miss()를 두면 실제로 계산할 때만 호출됨).
+    memory=False이면 메모리를 재지 않음 (아주 자주 호출되는 가벼운 단계용).
+    """
+    record = {"stage": name, "seconds": 0.0, "memory": None, "cache": "hit" if cached else None}
+    stages = _open_stages()
+    stages.append(record)
+    before = _rss() if memory else None
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        if memory:
+            record["memory"] = _memory_delta(before, _rss())
+        stages.pop()
+        _record(record)
+
+
+def miss():
+    # 가장 안쪽의 캐시 단계(stage(..., cached=True))를 미스로 표시
+    for record in reversed(_open_stages()):
+        if record["cache"] is not None:
+            record["cache"] = "miss"
+            return
+
+
+def record_stage(name, seconds, cache=None):
+    # 다른 스레드나 프로세스에서 실행된 단계처럼 stage()로 감쌀 수 없는 구간을 직접 기록
+    _record({"stage": name, "seconds": seconds, "memory": None, "cache": cache})
+
+
+def debug_enabled():
+    return os.environ.get(DEBUG_ENV) == "1" or st.query_params.get("debug") == "1"
+
+
+def _start_profiler():
+    # pyinstrument가 있으면 샘플링 프로파일러를, 없으면 cProfile을 사용 (스크립트 스레드만 측정)
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 다른 세션이 이미 프로파일링 중
+            return None
+        return profiler
+    profiler = Profiler()
+    profiler.start()
+    return profiler
+
+
+def _profile_report(profiler):
+    # {text: 요약, file_name, data: 내려받을 파일 내용}
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+        # pstats.dump_stats와 같은 형식 (snakeviz, pstats로 열 수 있음)
+        return {"text": out.getvalue(), "file_name": "profile.prof", "data": marshal.dumps(stats.stats)}
+    profiler.stop()
+    return {"text": profiler.output_text(), "file_name": "profile.html", "data": profiler.output_html().encode()}
+
+
+def _run_summary(run, stopped):
+    return {
+        "time": datetime.fromtimestamp(run.started_at, timezone.utc).isoformat(timespec="milliseconds"),
+        "page": run.page,
+        "seconds": round(run.last - run.start, 6),
+        "memory": _memory_delta(run.rss, _rss()),
+        "stopped": stopped,
+        "profiled": run.profiler is not None,
+        "stages": [
+            {**record, "seconds": round(record["seconds"], 6)}
+            for record in run.stages
+        ],
+    }
+
+
+def _write_metrics_file(path):
+    # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 바꿔치기
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(metrics.prometheus())
+    os.replace(tmp, path)
+
+
+def _close(run, stopped=False):
+    # 실행 기록을 마무리해 누적 지표, 구조화 로그, 지표 파일에 반영
+    run.finished = True
+    if run.profiler is not None:
+        st.session_state[PROFILE_RESULT_KEY] = {"page": run.page, **_profile_report(run.profiler)}
+    summary = _run_summary(run, stopped)
+    if not stopped:
+        # 중간에 끝난 실행은 마지막 단계까지만 알 수 있으므로 페이지 실행 시간에는 넣지 않음
+        metrics.add_run(run.page, summary["seconds"])
+    logger.info(json.dumps(summary, ensure_ascii=False))
+    if os.environ.get(METRICS_PATH_ENV):
+        _write_metrics_file(os.environ[METRICS_PATH_ENV])
+    return summary
+
+
+def begin_run(script):
+    """페이지 스크립트 맨 위에서 호출 (script: __file__).
+
+    이전 실행이 st.stop()이나 재실행으로 중간에 끝났으면 마지막 단계까지를 기록으로 남김.
+    """
+    previous = st.session_state.get(RUN_KEY)
+    if previous is not None and not previous.finished:
+        _close(previous, stopped=True)
+
+    run = PageRun(os.path.splitext(os.path.basename(script))[0])
+    if st.session_state.pop(PROFILE_REQUEST_KEY, False):
+        run.profiler = _start_profiler()
+    st.session_state[RUN_KEY] = run
+
+
+def _request_profile():
+    st.session_state[PROFILE_REQUEST_KEY] = True
+
+
+def finish_run():
+    # 페이지 스크립트 맨 아래에서 호출. 디버그 모드이면 사이드바에 이번 실행의 단계별 기록을 표시
+    run = st.session_state.get(RUN_KEY)
+    if run is None or run.finished:
+        return
+    run.last = time.perf_counter()
+    summary = _close(run)
+    if debug_enabled():
+        show_debug_sidebar(summary)
+
+
+def show_debug_sidebar(summary):
+    import pandas as pd
+
+    with st.sidebar.expander("성능 계측", expanded=True):
+        memory = summary["memory"]
+        st.caption(
+            f"이번 실행 {summary['seconds']:.3f}초"
+            + (f" · 메모리 {memory / 2 ** 20:+.1f} MB" if memory is not None else "")
+        )
+        stages = pd.DataFrame(summary["stages"], columns=["stage", "seconds", "memory", "cache"])
+        stages["memory"] = stages["memory"] / 2 ** 20
+        st.dataframe(stages.rename(columns={"memory": "memory_mb"}), hide_index=True)
+
+        st.caption("이 페이지 누적 (모든 세션, 부분 재실행 포함)")
+        st.dataframe(metrics.table(summary["page"]).drop(columns="page"), hide_index=True)
+
+        st.button("다음 실행 프로파일링", on_click=_request_profile,
+                  help="다음 한 번의 페이지 실행 동안 함수별 실행 시간을 기록합니다.")
+        st.download_button("실행 기록 (JSON)", json.dumps(summary, ensure_ascii=False, indent=2),
+                           file_name=f"{summary['page']}-run.json", mime="application/json")
+        st.download_button("누적 지표 (Prometheus)", metrics.prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+
+        profile = st.session_state.get(PROFILE_RESULT_KEY)
+        if profile is not None:
+            st.caption(f"프로파일: {profile['page']}")
+            st.code(profile["text"], language=None)
+            st.download_button("프로파일 내려받기", profile["data"], file_name=profile["file_name"])
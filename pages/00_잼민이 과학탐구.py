@@ -1,79 +1,25 @@
 import streamlit as st
 
+from catalog import get_catalog
+from instrumentation import begin_run, finish_run
+
 st.set_page_config(page_title="초등과학 궁금증 해결기", page_icon="🔍")
+begin_run(__file__)
 
 st.title("🔍 초등과학 궁금증 해결기")
 st.write("과학 분야를 선택하면, 재미있는 사례와 그 이유를 알려드려요!")
 
-# 과학 분야
-categories = ["물리", "화학", "생명", "지구과학"]
-
-# 사례 + 이유 딕셔너리
-science_examples = {
-    "물리": [
-        {
-            "case": "우주에서는 물방울이 둥근 구슬처럼 떠 있어요!",
-            "why": "우주에는 중력이 거의 없기 때문에 물이 아래로 흐르지 않고, 표면장력 때문에 동그랗게 뭉쳐서 떠다녀요."
-        },
-        {
-            "case": "자석은 철을 끌어당기고 같은 극끼리는 밀쳐요!",
-            "why": "자석 주위에는 자기장이 있어서 철을 끌어당기고, 같은 극끼리는 같은 방향의 자기장이 밀어내기 때문이에요."
-        },
-        {
-            "case": "빛은 직선으로 나아가요.",
-            "why": "빛은 공기나 진공 같은 매질을 따라 직선으로 이동하는 성질이 있어서 그림자도 생겨요."
-        }
-    ],
-    "화학": [
-        {
-            "case": "탄산음료에 박하사탕을 넣으면 거품이 솟아요!",
-            "why": "박하사탕의 표면에 기포가 잘 생겨서, 탄산 속의 이산화탄소 기체가 갑자기 빠져나오기 때문이에요."
-        },
-        {
-            "case": "산과 염기를 만나면 색이 바뀌는 지시약이 있어요!",
-            "why": "지시약은 산성이나 염기성 물질과 화학 반응을 하면서 색이 달라져요. 그래서 물질의 성질을 알 수 있어요."
-        },
-        {
-            "case": "베이킹소다에 식초를 넣으면 거품이 나요!",
-            "why": "이 둘이 만나면 화학 반응이 일어나면서 이산화탄소라는 기체가 생기고, 이 기체가 거품을 만들어요."
-        }
-    ],
-    "생명": [
-        {
-            "case": "문어는 색을 바꿔서 숨을 수 있어요!",
-            "why": "문어는 피부 속 색소주머니를 움직여서 몸 색을 바꿔요. 위험할 땐 잉크도 뿜어서 도망쳐요."
-        },
-        {
-            "case": "지렁이의 피는 초록색이에요!",
-            "why": "지렁이는 사람처럼 철이 아니라 다른 물질(클로로크루오린)을 써서 피가 초록빛을 띠어요."
-        },
-        {
-            "case": "식물도 숨을 쉬어요!",
-            "why": "식물은 낮에는 광합성을 하지만, 밤에는 산소를 들이마시고 이산화탄소를 내쉬는 호흡을 해요."
-        }
-    ],
-    "지구과학": [
-        {
-            "case": "화산은 땅속에서 뜨거운 마그마가 나오는 거예요!",
-            "why": "지구 내부는 매우 뜨거워요. 마그마가 올라오면 압력이 터지면서 용암과 가스가 분출돼요."
-        },
-        {
-            "case": "지진은 땅이 흔들리는 현상이죠!",
-            "why": "지구 표면은 큰 판으로 되어 있는데, 이 판들이 밀고 당기다 갑자기 움직이면 땅이 흔들려요."
-        },
-        {
-            "case": "달은 모양이 계속 바뀌어요!",
-            "why": "달이 지구를 돌면서 태양빛을 받는 방향이 바뀌기 때문에, 우리가 보는 모양도 달라져요."
-        }
-    ]
-}
+# 과학 분야별 사례와 이유는 data/recommendations.json의 카탈로그에서 조회
+science = get_catalog()["science"]
 
 # 사용자 선택
-selected_category = st.selectbox("과학 분야를 골라보세요!", categories)
+selected_category = st.selectbox("과학 분야를 골라보세요!", science.values["category"])
 
 # 출력
 if selected_category:
     st.subheader(f"🧪 '{selected_category}' 분야 사례와 이유")
-    for i, item in enumerate(science_examples[selected_category], 1):
+    for i, item in enumerate(science.lookup(category=selected_category).items, 1):
         st.markdown(f"**{i}. {item['case']}**")
         st.write(f"→ 왜 그럴까? {item['why']}")
+
+finish_run()
@@ -1,7 +1,17 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import plotly.graph_objects as go
+
+from charts import plotly_chart, wide_line_figure
+from instrumentation import begin_run, finish_run
+from stock_analytics import (
+    VOLATILITY_WINDOW,
+    correlation_matrix,
+    drawdown,
+    normalized_returns,
+    rolling_volatility,
+    summary,
+)
+from stock_data import load_fundamentals, load_prices
 
 # KOSPI 100 일부 종목 (원하는 대로 추가 가능)
 kospi100 = {
@@ -15,73 +25,101 @@ kospi100 = {
     "POSCO홀딩스": "005490.KS"
 }
 
+# 베타 계산에 사용할 시장 지수 (KOSPI)
+BENCHMARK = "^KS11"
+
+begin_run(__file__)
+
 st.title("📈 KOSPI 100 주가 비교 Plotly 웹앱")
 
 # 종목 선택 UI
-stock1_name = st.selectbox("첫 번째 종목 선택", list(kospi100.keys()))
-stock2_name = st.selectbox("두 번째 종목 선택", list(kospi100.keys()), index=1)
+stock_names = st.multiselect("비교할 종목 선택", list(kospi100.keys()), default=list(kospi100.keys())[:2])
 period = st.selectbox("기간 선택", ["1mo", "3mo", "6mo", "1y", "2y", "5y"], index=3)
 
+if not stock_names:
+    st.warning("최소 한 개 이상의 종목을 선택하세요.")
+    st.stop()
+
 # 티커 매핑
-ticker1 = kospi100[stock1_name]
-ticker2 = kospi100[stock2_name]
-tickers = [ticker1, ticker2]
-
-# 데이터 다운로드
-raw_data = yf.download(tickers, period=period)
-
-# 'Adj Close' 또는 'Close' 컬럼 안전하게 추출
-if isinstance(raw_data.columns, pd.MultiIndex):
-    if "Adj Close" in raw_data.columns.get_level_values(0):
-        data = raw_data["Adj Close"]
-    elif "Close" in raw_data.columns.get_level_values(0):
-        data = raw_data["Close"]
-        st.warning("⚠️ 'Adj Close'가 없어 'Close' 데이터를 대신 사용합니다.")
-    else:
-        st.error("❗ 'Adj Close'나 'Close' 데이터가 없습니다. 다른 종목을 선택하세요.")
-        st.stop()
-else:
-    if "Adj Close" in raw_data.columns:
-        data = raw_data[["Adj Close"]]
-        data.columns = [tickers[0]]
-    elif "Close" in raw_data.columns:
-        data = raw_data[["Close"]]
-        data.columns = [tickers[0]]
-        st.warning("⚠️ 'Adj Close'가 없어 'Close' 데이터를 대신 사용합니다.")
-    else:
-        st.error("❗ 유효한 주가 데이터가 없습니다.")
-        st.stop()
-
-data.dropna(inplace=True)
-returns = data / data.iloc[0] * 100
-
-# Plotly 그래프 생성
-fig = go.Figure()
-for ticker, name, color in zip(data.columns, [stock1_name, stock2_name], ['blue', 'red']):
-    fig.add_trace(go.Scatter(
-        x=returns.index,
-        y=returns[ticker],
-        mode='lines',
-        name=name,
-        line=dict(color=color)
-    ))
-
-fig.update_layout(
-    title="📊 기준일 대비 누적 수익률 (%) 비교",
-    xaxis_title="날짜",
-    yaxis_title="수익률 (%)",
-    template="plotly_white",
-    hovermode="x unified"
-)
+tickers = [kospi100[name] for name in stock_names]
+names = {kospi100[name]: name for name in stock_names}
+
+# 데이터 다운로드: 전체 종목과 지수를 한 번에 받아 로컬 저장소에 두고, 없는 기간만 추가로 받음
+all_data, close_only = load_prices(tuple(kospi100.values()) + (BENCHMARK,), period)
+missing = [t for t in tickers if t not in all_data.columns]
+if missing:
+    st.error(f"❗ 유효한 주가 데이터가 없습니다: {', '.join(names[t] for t in missing)}. 다른 종목을 선택하세요.")
+    st.stop()
+if close_only & set(tickers):
+    st.warning("⚠️ 'Adj Close'가 없어 'Close' 데이터를 대신 사용합니다.")
+
+data = all_data[tickers].dropna()
+
+
+def analytics(key):
+    # 종목 조합 x 기간 x 주가 데이터마다 한 번만 계산해 session_state에 보관 (확대 구간을 옮겨도 다시 계산하지 않음)
+    cached = st.session_state.get("_stock_analytics")
+    if cached is not None and cached["key"] == key:
+        return cached
+    benchmark = all_data[BENCHMARK].reindex(data.index) if BENCHMARK in all_data.columns else None
+    cached = {
+        "key": key,
+        "returns": normalized_returns(data),
+        "summary": summary(data, benchmark).rename(index=names).round(2),
+        "volatility": rolling_volatility(data),
+        "drawdown": drawdown(data),
+        "correlation": correlation_matrix(data).rename(index=names, columns=names),
+    }
+    st.session_state["_stock_analytics"] = cached
+    return cached
 
-st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def price_charts(key):
+    # 확대 구간 슬라이더는 이 섹션(그래프와 위험 지표)만 다시 실행
+    results = analytics(key)
+    returns = results["returns"]
+
+    # 확대 구간: 긴 기간은 화면 폭에 맞게 줄여서 그리고, 구간을 좁히면 원본 해상도로 표시
+    view = slice(None)
+    first_day, last_day = returns.index.min().to_pydatetime(), returns.index.max().to_pydatetime()
+    if first_day < last_day:
+        view = slice(*st.slider("확대 구간", min_value=first_day, max_value=last_day,
+                                value=(first_day, last_day), format="YYYY-MM-DD"))
+
+    # Plotly 그래프 생성
+    fig = wide_line_figure(returns.loc[view], "📊 기준일 대비 누적 수익률 (%) 비교", "수익률 (%)", names)
+    plotly_chart(fig)
+
+    # 위험 지표 (모든 종목을 한 번에 계산)
+    st.subheader("📉 위험 지표 비교")
+    st.dataframe(results["summary"], use_container_width=True)
+
+    tab1, tab2, tab3 = st.tabs(["변동성", "낙폭", "상관관계"])
+    with tab1:
+        fig_vol = wide_line_figure(results["volatility"].loc[view], f"{VOLATILITY_WINDOW}일 이동 변동성 (연율화, %)", "변동성 (%)", names)
+        plotly_chart(fig_vol)
+    with tab2:
+        fig_dd = wide_line_figure(results["drawdown"].loc[view], "고점 대비 낙폭 (%)", "낙폭 (%)", names)
+        plotly_chart(fig_dd)
+    with tab3:
+        # plotly.express는 불러오는 데 시간이 걸리므로 히트맵을 그릴 때 가져옴
+        import plotly.express as px
+
+        fig_corr = px.imshow(results["correlation"], text_auto=".2f", color_continuous_scale="RdBu_r", zmin=-1, zmax=1,
+                             title="일간 수익률 상관계수")
+        plotly_chart(fig_corr)
+
+
+# 주가 캐시가 만료되어 새로 받은 데이터(최근 구간 수정주가 보정 포함)는 내용 해시가 달라져 다시 계산됨
+data_version = int(pd.util.hash_pandas_object(data).sum())
+price_charts((tuple(tickers), period, data_version))
 
 # 주요 지표 표시
 st.subheader("📌 주요 지표 비교")
 
-def get_info(ticker):
+def get_info(info):
     try:
-        info = yf.Ticker(ticker).info
         return {
             "시가총액": f"{info.get('marketCap', 'N/A'):,}",
             "PER": info.get('trailingPE', 'N/A'),
@@ -98,17 +136,11 @@ def get_info(ticker):
             "산업": "N/A"
         }
 
-info1 = get_info(ticker1)
-info2 = get_info(ticker2)
-
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown(f"### {stock1_name}")
-    for k, v in info1.items():
-        st.write(f"**{k}:** {v}")
-with col2:
-    st.markdown(f"### {stock2_name}")
-    for k, v in info2.items():
-        st.write(f"**{k}:** {v}")
+# 선택한 종목의 기업 정보를 동시에 조회 (하루 동안 캐시)
+infos = load_fundamentals(tickers)
+info_table = pd.DataFrame({names[t]: get_info(infos[t] or {}) for t in tickers}).T
+st.dataframe(info_table.astype(str), use_container_width=True)
 
 st.caption("📉 데이터 출처: Yahoo Finance")
+
+finish_run()
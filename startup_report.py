@@ -0,0 +1,71 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# 사용법: python startup_report.py [페이지 ...] [--runs N] [--json]
+# 페이지마다 새 파이썬 프로세스에서 스크립트를 한 번 실행해(파일 업로드 없음, 첫 화면까지)
+# 걸린 시간과 그때까지 불러온 무거운 라이브러리를 보여 줍니다.
+
+# 첫 화면에서는 불러오지 않아야 하는 라이브러리
+HEAVY_MODULES = ["statsmodels", "plotly.express", "yfinance", "matplotlib"]
+
+_PROBE = """
+import json, logging, runpy, sys, time
+start = time.perf_counter()
+import streamlit
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+after_streamlit = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+end = time.perf_counter()
+print(json.dumps({
+    "streamlit": after_streamlit - start,
+    "total": end - start,
+    "modules": [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+"""
+
+
+def default_pages():
+    return ["main.py"] + sorted(glob.glob(os.path.join("pages", "*.py")))
+
+
+def measure(page, env=None):
+    # 페이지 하나를 새 프로세스에서 실행해 {streamlit, total, modules}를 반환
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, page, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페이지별 첫 화면까지의 시작 시간을 측정합니다.")
+    parser.add_argument("pages", nargs="*", help="측정할 페이지 (기본값: main.py와 pages/*.py)")
+    parser.add_argument("--runs", type=int, default=3, help="페이지마다 반복 실행 횟수 (가장 빠른 값을 사용)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # 주가 페이지는 네트워크 없이 합성 주가로, 임시 저장소에서 실행
+        env = dict(os.environ, STOCK_PRICE_SOURCE="fixture", STOCK_STORE_PATH=os.path.join(tmp, "prices.sqlite3"))
+        for page in args.pages or default_pages():
+            runs = [measure(page, env) for _ in range(args.runs)]
+            report[page] = min(runs, key=lambda run: run["total"])
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    for page, run in report.items():
+        modules = ", ".join(run["modules"]) or "-"
+        print(f"{run['total']:6.2f}s (streamlit {run['streamlit']:.2f}s)  {page}  [{modules}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
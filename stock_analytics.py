@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# 연율화에 사용하는 연간 거래일 수
+TRADING_DAYS = 252
+VOLATILITY_WINDOW = 20
+
+# 모든 함수는 (날짜 x 종목) 넓은 가격 표를 받아 종목 방향으로 한 번에 계산 (종목별 반복 없음)
+
+
+def normalized_returns(prices):
+    # 기준일(종목별 첫 유효값) 대비 누적 수익률 (%)
+    first = prices.bfill().iloc[0]
+    return prices / first * 100
+
+
+def daily_returns(prices):
+    return prices.pct_change(fill_method=None).iloc[1:]
+
+
+def rolling_volatility(prices, window=VOLATILITY_WINDOW):
+    # 로그 수익률의 이동 표준편차를 연율화 (%)
+    log_returns = np.log(prices).diff()
+    return log_returns.rolling(window).std() * np.sqrt(TRADING_DAYS) * 100
+
+
+def drawdown(prices):
+    # 직전 고점 대비 하락률 (%)
+    return (prices / prices.cummax() - 1) * 100
+
+
+def correlation_matrix(prices):
+    return daily_returns(prices).corr()
+
+
+def beta(prices, benchmark):
+    # 모든 종목의 벤치마크 대비 베타를 행렬 연산 한 번으로 계산
+    returns = daily_returns(prices)
+    market = benchmark.pct_change(fill_method=None).reindex(returns.index)
+    valid = returns.notna().to_numpy() & market.notna().to_numpy()[:, None]
+
+    r = np.where(valid, returns.to_numpy(), 0.0)
+    m = np.where(valid, market.to_numpy()[:, None], 0.0)
+    n = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_mean = r.sum(axis=0) / n
+        m_mean = m.sum(axis=0) / n
+        cov = ((r - r_mean) * (m - m_mean) * valid).sum(axis=0)
+        var = (((m - m_mean) * valid) ** 2).sum(axis=0)
+        values = cov / var
+    return pd.Series(values, index=prices.columns, name="베타")
+
+
+def summary(prices, benchmark=None):
+    returns = daily_returns(prices)
+    last = prices.ffill().iloc[-1]
+    first = prices.bfill().iloc[0]
+    table = pd.DataFrame({
+        "누적 수익률 (%)": (last / first - 1) * 100,
+        "연율화 변동성 (%)": returns.std() * np.sqrt(TRADING_DAYS) * 100,
+        "최대 낙폭 (%)": drawdown(prices).min(),
+    })
+    if benchmark is not None:
+        table["베타"] = beta(prices, benchmark)
+    return table
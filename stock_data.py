@@ -0,0 +1,323 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from instrumentation import miss, stage
+
+# 주가 저장소(SQLite) 경로
+STORE_PATH_ENV = "STOCK_STORE_PATH"
+DEFAULT_STORE_PATH = "price_store.sqlite3"
+# "fixture"로 지정하면 네트워크 없이 합성 주가를 사용 (테스트용)
+SOURCE_ENV = "STOCK_PRICE_SOURCE"
+# 마지막으로 받은 지 이 시간(초)이 지나면 최근 구간을 다시 받음
+PRICE_TTL = 6 * 60 * 60
+# TTL이 지나 다시 받을 때 함께 갱신할 최근 일수 (수정주가 보정 반영)
+REFRESH_DAYS = 7
+# 기업 정보(Ticker.info)는 하루 동안 재사용하고, 한 번의 조회는 이 시간(초) 안에 끝나야 함
+INFO_TTL = 24 * 60 * 60
+INFO_TIMEOUT = 10
+INFO_WORKERS = 8
+
+PERIODS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+
+
+def period_range(period, today=None):
+    today = today or date.today()
+    start = (pd.Timestamp(today) - PERIODS[period]).date()
+    return start, today
+
+
+class YahooSource:
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        # end는 포함되지 않으므로 하루 뒤까지 요청
+        raw = yf.download(tickers, start=start, end=end + timedelta(days=1), auto_adjust=False,
+                          progress=False, group_by="column")
+        return _split_columns(raw, tickers)
+
+    def info(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).info
+
+
+class FixtureSource:
+    # 종목별로 항상 같은 합성 주가(영업일 기준 랜덤워크)를 만들어 주는 오프라인 소스
+    def __init__(self, base_date=date(2000, 1, 3)):
+        self.base_date = base_date
+
+    def download(self, tickers, start, end):
+        days = pd.bdate_range(self.base_date, end)
+        frames = {}
+        for ticker in tickers:
+            seed = int(hashlib.sha256(ticker.encode()).hexdigest()[:8], 16)
+            rng = np.random.default_rng(seed)
+            close = 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(days))))
+            frame = pd.DataFrame({"close": close, "adj_close": close * 0.98}, index=days)
+            frames[ticker] = frame[frame.index >= pd.Timestamp(start)]
+        return frames
+
+    def info(self, ticker):
+        seed = int(hashlib.sha256(ticker.encode()).hexdigest()[:8], 16)
+        rng = np.random.default_rng(seed)
+        return {
+            "marketCap": int(rng.integers(10 ** 12, 5 * 10 ** 14)),
+            "trailingPE": round(float(rng.uniform(5, 40)), 2),
+            "priceToBook": round(float(rng.uniform(0.5, 5)), 2),
+            "dividendYield": round(float(rng.uniform(0, 4)), 2),
+            "industry": "Fixture",
+        }
+
+
+def _split_columns(raw, tickers):
+    # yf.download 결과를 {티커: DataFrame(close, adj_close)}로 변환
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+
+    for ticker in tickers:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if ticker not in raw.columns.get_level_values(1):
+                continue
+            sub = raw.xs(ticker, axis=1, level=1)
+        else:
+            sub = raw
+        frame = pd.DataFrame(index=pd.DatetimeIndex(sub.index).tz_localize(None))
+        frame["close"] = sub["Close"].to_numpy() if "Close" in sub else np.nan
+        frame["adj_close"] = sub["Adj Close"].to_numpy() if "Adj Close" in sub else np.nan
+        frames[ticker] = frame.dropna(how="all")
+    return frames
+
+
+def default_source():
+    if os.environ.get(SOURCE_ENV) == "fixture":
+        return FixtureSource()
+    return YahooSource()
+
+
+class PriceStore:
+    """티커별 일별 종가를 SQLite에 저장하고, 요청 구간 중 없는 부분만 내려받음."""
+
+    def __init__(self, path=None, source=None, ttl=PRICE_TTL):
+        self.path = path or os.environ.get(STORE_PATH_ENV, DEFAULT_STORE_PATH)
+        self.source = source or default_source()
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "ticker TEXT, date TEXT, close REAL, adj_close REAL, PRIMARY KEY (ticker, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT PRIMARY KEY, start TEXT, end TEXT, fetched_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # 스트림릿은 여러 스레드에서 실행되므로 호출마다 연결을 새로 열고 닫음
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _coverage(self, conn, tickers):
+        placeholders = ",".join("?" * len(tickers))
+        rows = conn.execute(
+            f"SELECT ticker, start, end, fetched_at FROM coverage WHERE ticker IN ({placeholders})", tickers
+        ).fetchall()
+        return {
+            ticker: (date.fromisoformat(start), date.fromisoformat(end), fetched_at)
+            for ticker, start, end, fetched_at in rows
+        }
+
+    def missing_ranges(self, tickers, start, end, now=None):
+        # {(시작, 끝): [티커...]}. 같은 구간이 빠진 티커끼리 묶어 한 번에 요청
+        now = now or time.time()
+        with self._connect() as conn:
+            coverage = self._coverage(conn, tickers)
+
+        ranges = {}
+        for ticker in tickers:
+            if ticker not in coverage:
+                ranges.setdefault((start, end), []).append(ticker)
+                continue
+
+            cov_start, cov_end, fetched_at = coverage[ticker]
+            if start < cov_start:
+                ranges.setdefault((start, cov_start - timedelta(days=1)), []).append(ticker)
+            # 저장된 마지막 REFRESH_DAYS일은 장중에 받은 값일 수 있어, TTL이 지나면 앞으로 늘리는 요청이어도 다시 받음
+            recent_start = max(cov_start, cov_end - timedelta(days=REFRESH_DAYS))
+            if now - fetched_at > self.ttl and end >= recent_start:
+                ranges.setdefault((recent_start, max(end, cov_end)), []).append(ticker)
+            elif end > cov_end:
+                ranges.setdefault((cov_end + timedelta(days=1), end), []).append(ticker)
+        return ranges
+
+    def fetch(self, tickers, start, end):
+        tickers = list(dict.fromkeys(tickers))
+        for (range_start, range_end), group in self.missing_ranges(tickers, start, end).items():
+            with stage("price_download"):
+                frames = self.source.download(group, range_start, range_end)
+            self._save(group, frames, range_start, range_end)
+
+    def _save(self, tickers, frames, start, end):
+        now = time.time()
+        with self._connect() as conn:
+            coverage = self._coverage(conn, tickers)
+            for ticker in tickers:
+                frame = frames.get(ticker)
+                if frame is not None and not frame.empty:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?)",
+                        [
+                            (ticker, day.strftime("%Y-%m-%d"), _to_float(close), _to_float(adj_close))
+                            for day, close, adj_close in zip(frame.index, frame["close"], frame["adj_close"])
+                        ],
+                    )
+                elif frame is None and len(pd.bdate_range(start, end)):
+                    # 영업일이 있는데 받지 못한 티커는 저장 구간을 넓히지 않음 (다음 요청에서 다시 시도)
+                    continue
+
+                cov_start, cov_end, fetched_at = start, end, now
+                if ticker in coverage:
+                    old_start, old_end, old_fetched_at = coverage[ticker]
+                    cov_start, cov_end = min(start, old_start), max(end, old_end)
+                    # 마지막 REFRESH_DAYS일을 이번에 모두 다시 받았을 때만 받은 시각을 갱신 (과거 구간만 채운 경우 등은 유지)
+                    recent_start = max(cov_start, cov_end - timedelta(days=REFRESH_DAYS))
+                    if not (start <= recent_start and end >= cov_end):
+                        fetched_at = old_fetched_at
+                conn.execute(
+                    "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                    (ticker, cov_start.isoformat(), cov_end.isoformat(), fetched_at),
+                )
+
+    def read(self, tickers, start, end):
+        # 종목별 (수정)종가를 열로 갖는 넓은 표와, 'Adj Close'가 없어 'Close'를 쓴 티커 집합
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = pd.read_sql_query(
+                f"SELECT ticker, date, close, adj_close FROM prices "
+                f"WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ? ORDER BY date",
+                conn,
+                params=[*tickers, start.isoformat(), end.isoformat()],
+            )
+
+        rows["date"] = pd.to_datetime(rows["date"])
+        close_only = set(rows.loc[rows["adj_close"].isna(), "ticker"])
+        rows["price"] = rows["adj_close"].fillna(rows["close"])
+        data = rows.pivot(index="date", columns="ticker", values="price")
+        return data.reindex(columns=[t for t in tickers if t in data.columns]), close_only
+
+    def load(self, tickers, period):
+        start, end = period_range(period)
+        self.fetch(tickers, start, end)
+        return self.read(tickers, start, end)
+
+
+def _to_float(value):
+    return None if pd.isna(value) else float(value)
+
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+
+@st.cache_data(ttl=600, show_spinner="주가 데이터를 불러오는 중...")
+def _load_prices(tickers, period):
+    miss()
+    return get_price_store().load(list(tickers), period)
+
+
+def load_prices(tickers, period):
+    with stage("load_prices", cached=True):
+        return _load_prices(tickers, period)
+
+
+class FundamentalsService:
+    """여러 종목의 Ticker.info를 스레드 풀로 동시에 조회하고 종목별로 INFO_TTL 동안 캐시.
+
+    조회 중인 종목은 진행 중인 조회를 함께 기다리므로, 느린 종목도 한 번만 요청함.
+    """
+
+    def __init__(self, source=None, ttl=INFO_TTL, timeout=INFO_TIMEOUT, max_workers=INFO_WORKERS):
+        self.source = source or default_source()
+        self.ttl = ttl
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ticker-info")
+        self._cache = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, tickers):
+        # {티커: info 딕셔너리 또는 None(실패/시간 초과)}
+        now = time.time()
+        results = {}
+        futures = {}
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                cached = self._cache.get(ticker)
+                if cached is not None and now - cached[0] < self.ttl:
+                    results[ticker] = cached[1]
+                    continue
+                future = self._pending.get(ticker)
+                if future is None:
+                    future = self._executor.submit(self._info, ticker)
+                    self._pending[ticker] = future
+                futures[future] = ticker
+        if futures:
+            miss()
+
+        # 전체 대기 시간이 timeout을 넘지 않도록 한 번에 기다림
+        # (늦은 조회는 이번 실행에서만 빠지고, 끝나면 캐시에 남아 다음 실행에서 사용)
+        done, not_done = wait(futures, timeout=self.timeout)
+        for future in not_done:
+            results[futures[future]] = None
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception:
+                results[futures[future]] = None
+        return results
+
+    def _info(self, ticker):
+        # 스레드 풀에서 실행되므로 페이지 기록이 아닌 누적 지표(background)에만 반영
+        try:
+            with stage("ticker_info"):
+                info = self.source.info(ticker)
+            with self._lock:
+                self._cache[ticker] = (time.time(), info)
+            return info
+        finally:
+            # 실패한 조회는 캐시하지 않고, 다음 요청에서 다시 시도
+            with self._lock:
+                self._pending.pop(ticker, None)
+
+
+@st.cache_resource
+def get_fundamentals_service():
+    return FundamentalsService()
+
+
+def load_fundamentals(tickers):
+    with stage("fundamentals", cached=True):
+        return get_fundamentals_service().get(list(tickers))
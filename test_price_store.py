@@ -0,0 +1,103 @@
+import time
+from datetime import date, timedelta
+
+from stock_data import REFRESH_DAYS, FixtureSource, PriceStore
+
+# PriceStore의 빠진 구간 계산과 TTL 새로고침을 네트워크 없이 확인 (FixtureSource 사용)
+
+START, END = date(2024, 1, 1), date(2024, 6, 28)
+
+
+class CountingSource(FixtureSource):
+    # 내려받은 (티커, 시작, 끝)을 기록하는 합성 소스. skip에 있는 티커는 받지 못한 것처럼 빼고 돌려줌
+    def __init__(self, skip=()):
+        super().__init__()
+        self.calls = []
+        self.skip = set(skip)
+
+    def download(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        frames = super().download(tickers, start, end)
+        return {ticker: frame for ticker, frame in frames.items() if ticker not in self.skip}
+
+
+def make_store(tmp_path, source, ttl=60):
+    return PriceStore(str(tmp_path / "prices.sqlite3"), source, ttl)
+
+
+def test_empty_store_requests_whole_range_once(tmp_path):
+    store = make_store(tmp_path, CountingSource())
+    assert store.missing_ranges(["A", "B"], START, END) == {(START, END): ["A", "B"]}
+
+
+def test_fetch_then_only_gaps_are_missing(tmp_path):
+    source = CountingSource()
+    store = make_store(tmp_path, source)
+    store.fetch(["A"], START, END)
+    assert store.missing_ranges(["A"], START, END) == {}
+
+    # 같은 구간은 다시 받지 않음
+    store.fetch(["A"], START, END)
+    assert len(source.calls) == 1
+
+    # 앞뒤로 넓히면 없는 부분만, 새 티커는 전체 구간을 요청
+    earlier, later = START - timedelta(days=30), END + timedelta(days=10)
+    assert store.missing_ranges(["A", "B"], earlier, later) == {
+        (earlier, START - timedelta(days=1)): ["A"],
+        (END + timedelta(days=1), later): ["A"],
+        (earlier, later): ["B"],
+    }
+
+
+def test_stale_coverage_refreshes_recent_days(tmp_path):
+    store = make_store(tmp_path, CountingSource(), ttl=60)
+    store.fetch(["A"], START, END)
+
+    assert store.missing_ranges(["A"], START, END, now=time.time() + 30) == {}
+    assert store.missing_ranges(["A"], START, END, now=time.time() + 120) == {
+        (END - timedelta(days=REFRESH_DAYS), END): ["A"]
+    }
+
+
+def test_failed_ticker_is_retried(tmp_path):
+    # 받지 못한 티커는 저장 구간을 넓히지 않아 다음 요청에서 다시 받음
+    store = make_store(tmp_path, CountingSource(skip={"B"}))
+    store.fetch(["A", "B"], START, END)
+    assert store.missing_ranges(["A", "B"], START, END) == {(START, END): ["B"]}
+
+    data, close_only = store.read(["A", "B"], START, END)
+    assert list(data.columns) == ["A"]
+    assert data.index.min().date() >= START and data.index.max().date() <= END
+    assert close_only == set()
+
+
+def test_stale_coverage_refreshes_recent_days_when_extending(tmp_path):
+    # 하루가 지나 다음 날까지 요청해도, 전날 장중에 받은 마지막 며칠을 함께 다시 받음
+    store = make_store(tmp_path, CountingSource(), ttl=60)
+    store.fetch(["A"], START, END)
+
+    next_day = END + timedelta(days=1)
+    assert store.missing_ranges(["A"], START, next_day, now=time.time() + 24 * 60 * 60) == {
+        (END - timedelta(days=REFRESH_DAYS), next_day): ["A"]
+    }
+
+
+def test_backfill_keeps_recent_days_stale(tmp_path, monkeypatch):
+    # 과거 구간만 채운 요청은 최근 구간을 받은 시각을 갱신하지 않음
+    clock = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    source = CountingSource()
+    store = make_store(tmp_path, source, ttl=60)
+    store.fetch(["A"], START, END)
+
+    clock[0] += 30
+    earlier = START - timedelta(days=30)
+    store.fetch(["A"], earlier, END)
+    assert source.calls[-1] == (("A",), earlier, START - timedelta(days=1))
+
+    clock[0] += 40
+    assert store.missing_ranges(["A"], earlier, END) == {(END - timedelta(days=REFRESH_DAYS), END): ["A"]}
+
+    # 최근 구간을 다시 받으면 새로 받은 것으로 봄
+    store.fetch(["A"], earlier, END)
+    assert store.missing_ranges(["A"], earlier, END) == {}